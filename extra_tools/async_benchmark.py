@@ -0,0 +1,121 @@
+"""
+Compares fetching activity streams with the threaded StravaAPI and AsyncStravaAPI against a local stand-in
+server with artificial latency, so no Strava rate limit is used:
+
+    python -m extra_tools.async_benchmark --activities 200 --latency 0.05 --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+from source.api import StravaAPI
+from source.async_api import AsyncStravaAPI
+
+STREAMS_PATH = re.compile(r"^/activities/(\d+)/streams")
+
+
+class StaticTokenManager:
+    """
+    Token manager stand-in which never refreshes.
+    """
+
+    def get_access_token(self) -> str:
+        return "benchmark"
+
+    async def get_access_token_async(self, client) -> str:
+        return "benchmark"
+
+
+def create_server(latency: float, samples: int) -> ThreadingHTTPServer:
+    body = json.dumps(
+        {
+            "heartrate": {"data": [150] * samples},
+            "velocity_smooth": {"data": [3.0] * samples},
+            "time": {"data": list(range(samples))},
+        }
+    ).encode()
+
+    class StreamsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            status = 200 if STREAMS_PATH.match(self.path) else 404
+            payload = body if status == 200 else b"{}"
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StreamsHandler)
+    server.daemon_threads = True
+    return server
+
+
+def run_threaded(base_url: str, activity_ids: list, workers: int) -> float:
+    api = StravaAPI(StaticTokenManager(), base_url=base_url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(api.get_activity_streams, activity_ids))
+    elapsed = time.perf_counter() - start
+    assert all(results), "Threaded client failed to fetch some streams."
+    return elapsed
+
+
+async def run_async(base_url: str, activity_ids: list, workers: int) -> float:
+    async with AsyncStravaAPI(StaticTokenManager(), base_url=base_url, max_concurrency=workers) as api:
+        start = time.perf_counter()
+        results = await api.get_activity_streams_batch(activity_ids)
+        elapsed = time.perf_counter() - start
+    assert all(results.values()), "Async client failed to fetch some streams."
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Server latency per request in seconds")
+    parser.add_argument("--samples", type=int, default=3600, help="Samples per stream")
+    parser.add_argument("--workers", type=int, default=8, help="Threads / concurrent requests")
+    args = parser.parse_args()
+
+    logger.remove()
+    server = create_server(args.latency, args.samples)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    activity_ids = list(range(args.activities))
+    try:
+        threaded = run_threaded(base_url, activity_ids, args.workers)
+        asynchronous = asyncio.run(run_async(base_url, activity_ids, args.workers))
+    finally:
+        server.shutdown()
+
+    print(
+        json.dumps(
+            {
+                "activities": args.activities,
+                "workers": args.workers,
+                "latency_s": args.latency,
+                "threaded_s": round(threaded, 3),
+                "async_s": round(asynchronous, 3),
+                "threaded_rps": round(args.activities / threaded, 1),
+                "async_rps": round(args.activities / asynchronous, 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ from datetime import timedelta
 from garmin_fit_sdk import Decoder, Stream
 from loguru import logger
 
+from source.stream_cleaning import clean_streams
+
+# FIT sport names mapped to Strava sport types.
+SPORT_TYPES = {"running": "Run", "cycling": "Ride", "walking": "Walk", "hiking": "Hike", "swimming": "Swim"}
+
 
 class FitFileDecoder:
     """
@@ -104,12 +109,13 @@ class FitFileDecoder:
     def pace_within_limit(self):
         """
         Filters pace values, keeping only those within the defined heart rate limits.
+        Records without movement (zero pace) are skipped, so stops do not lower the average.
 
         :return: A list of pace values as timedelta objects.
         """
         temp_pace = []
         for pace, hr in zip(self.dict_items["pace"], self.dict_items["heart_rate"]):
-            if self.low_hr_limit <= hr <= self.high_hr_limit:
+            if pace and self.low_hr_limit <= hr <= self.high_hr_limit:
                 temp_pace.append(pace)
         return temp_pace
 
@@ -138,3 +144,41 @@ class FitFileDecoder:
                 f"Average pace within {self.low_hr_limit} - {self.high_hr_limit} -> {av_min}:{round(av_sec, 2)}"
             )
         return {self.training_date: average_pace}
+
+    def to_activity(self):
+        """
+        Converts the FIT file to activity summary and streams in the format used by StravaAPI,
+        so it can be stored with DataBaseEditor.add_activity_to_db.
+
+        FIT activities have no Strava id, negative start timestamp is used instead to keep ids disjoint.
+
+        :return: Tuple of activity dictionary and streams dictionary.
+        """
+        if self.messages is None:
+            self._read_fit_file()
+        records = [record for record in self.messages.get("record_mesgs", []) if "timestamp" in record]
+        if not records:
+            raise ValueError(f"No records found in FIT file: {self.file_path}")
+        session = (self.messages.get("session_mesgs") or [{}])[0]
+        start = session.get("start_time") or records[0]["timestamp"]
+
+        streams = {
+            "time": {"data": [(record["timestamp"] - start).total_seconds() for record in records]},
+            "heartrate": {"data": [record.get("heart_rate") or 0 for record in records]},
+            "velocity_smooth": {"data": [record.get("enhanced_speed") or 0 for record in records]},
+            "distance": {"data": [record.get("distance") or 0 for record in records]},
+        }
+        heart_rates = [hr for hr in streams["heartrate"]["data"] if hr]
+        sport = str(session.get("sport", "running"))
+        activity = {
+            "id": -int(start.timestamp()),
+            "start_date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "sport_type": SPORT_TYPES.get(sport, sport.title()),
+            "average_heartrate": session.get("avg_heart_rate")
+            or (sum(heart_rates) / len(heart_rates) if heart_rates else None),
+            # Stops would drag a plain mean of the speed stream down, only moving samples are averaged.
+            "average_speed": session.get("enhanced_avg_speed")
+            or clean_streams(streams)["quality"]["moving_average_speed"],
+            "elapsed_time": session.get("total_elapsed_time") or streams["time"]["data"][-1],
+        }
+        return activity, streams
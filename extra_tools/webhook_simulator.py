@@ -0,0 +1,62 @@
+"""
+Simulates Strava push subscription events against a locally running webhook receiver
+(python main.py webhook --verify-token TOKEN):
+
+    python -m extra_tools.webhook_simulator --url http://127.0.0.1:8000/webhook validate --verify-token TOKEN
+    python -m extra_tools.webhook_simulator --url http://127.0.0.1:8000/webhook create 14341007768
+"""
+
+import argparse
+import time
+
+import requests
+
+from source.webhook import WEBHOOK_PATH
+
+DEFAULT_URL = f"http://127.0.0.1:8000{WEBHOOK_PATH}"
+
+
+def make_event(activity_id: int, aspect_type: str, updates: dict = None, object_type: str = "activity") -> dict:
+    """
+    Builds an event in the format sent by Strava.
+    """
+    return {
+        "aspect_type": aspect_type,
+        "event_time": int(time.time()),
+        "object_id": activity_id,
+        "object_type": object_type,
+        "owner_id": 1,
+        "subscription_id": 1,
+        "updates": updates or {},
+    }
+
+
+def make_validation_params(verify_token: str, challenge: str = "simulated-challenge") -> dict:
+    """
+    Builds query params of the subscription validation request.
+    """
+    return {"hub.mode": "subscribe", "hub.challenge": challenge, "hub.verify_token": verify_token}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL)
+    subparsers = parser.add_subparsers(dest="aspect_type", required=True)
+    subparsers.add_parser("validate").add_argument("--verify-token", required=True)
+    for aspect_type in ("create", "update", "delete"):
+        sub = subparsers.add_parser(aspect_type)
+        sub.add_argument("activity_id", type=int)
+        if aspect_type == "update":
+            sub.add_argument("--sport-type", help="New sport type, e.g. Run")
+    args = parser.parse_args()
+
+    if args.aspect_type == "validate":
+        response = requests.get(args.url, params=make_validation_params(args.verify_token))
+    else:
+        updates = {"type": args.sport_type} if getattr(args, "sport_type", None) else {}
+        response = requests.post(args.url, json=make_event(args.activity_id, args.aspect_type, updates))
+    print(response.status_code, response.text)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,33 @@ from loguru import logger
 
 from source.token_manager import TokenManager
 
-ACTIVITIES_URL = "https://www.strava.com/api/v3/athlete/activities"
-ONE_ACTIVITY_TEMPLATE = "https://www.strava.com/api/v3/activities/{}/streams"
+API_BASE_URL = "https://www.strava.com/api/v3"
+ACTIVITIES_PATH = "/athlete/activities"
+ACTIVITY_PATH_TEMPLATE = "/activities/{}"
+STREAMS_PATH_TEMPLATE = "/activities/{}/streams"
+ACTIVITIES_URL = API_BASE_URL + ACTIVITIES_PATH
+ONE_ACTIVITY_TEMPLATE = API_BASE_URL + STREAMS_PATH_TEMPLATE
+ACTIVITIES_PER_PAGE = 200
+
+DEFAULT_STREAM_PROFILE = "detail"
+# Streams imported from FIT files hold full device resolution, no Strava profile adds anything to them.
+FIT_STREAM_PROFILE = "fit"
+# Profiles are ordered from the cheapest to the most complete one, a stream stored with a given profile
+# satisfies every request for a profile with lower or equal rank.
+STREAM_PROFILES = {
+    "trend": {
+        "rank": 0,
+        "keys": ["heartrate", "velocity_smooth", "moving"],
+        "resolution": "low",
+        "series_type": "time",
+    },
+    "detail": {
+        "rank": 1,
+        "keys": ["heartrate", "velocity_smooth", "time", "distance", "moving"],
+        "resolution": "high",
+        "series_type": "distance",
+    },
+}
 
 
 class StravaAPI:
@@ -16,12 +41,16 @@ class StravaAPI:
     Provides methods to access Strava endpoints like activities and stream data.
     """
 
-    def __init__(self, token_manager: TokenManager):
+    def __init__(self, token_manager: TokenManager, base_url: str = API_BASE_URL):
         self.token_manager = token_manager
+        self.base_url = base_url
+        # Status of the last get_activity / get_activity_streams call, meaningful for single-threaded callers
+        # (WebhookIngestor) deciding whether a failed request is worth repeating.
+        self.last_status_code = None
 
     def get_activities(self, start_date: str, end_date: str, activity_types: Optional[Union[str, List[str]]] = None):
         """
-        Take user activities within a date range.
+        Take user activities within a date range. An empty list is returned when any page fails.
 
         :param start_date: Start date in 'YYYY-MM-DD'
         :param end_date: End date in 'YYYY-MM-DD'
@@ -30,36 +59,70 @@ class StravaAPI:
         """
         logger.info(f"Getting {activity_types} activities from {start_date} to {end_date}")
         headers = {"Authorization": f"Bearer {self.token_manager.get_access_token()}"}
-        after = int(time.mktime(time.strptime(start_date, "%Y-%m-%d")))
-        before = int(time.mktime(time.strptime(end_date, "%Y-%m-%d")))
+        activities = []
+        page = 1
+        while True:
+            response = requests.get(
+                self.base_url + ACTIVITIES_PATH,
+                headers=headers,
+                params=self.activities_params(start_date, end_date, page),
+            )
+            if response.status_code != HTTPStatus.OK:
+                break
+            batch = response.json()
+            activities.extend(batch)
+            if len(batch) < ACTIVITIES_PER_PAGE:
+                break
+            page += 1
 
-        response = requests.get(
-            ACTIVITIES_URL, headers=headers, params={"after": after, "before": before, "per_page": 200}
-        )
         if response.status_code == HTTPStatus.OK:
             logger.success("Successfully retrieved activities.")
-            activities = response.json()
-            if activity_types is None:
-                return activities
-            if isinstance(activity_types, str):
-                activity_types = [activity_types]
-
-            filtered_activities = [a for a in activities if a.get("sport_type") in activity_types]
-            logger.info(f"Filtered {len(filtered_activities)} activities of type(s): {activity_types}")
-            return filtered_activities
+            return self.filter_activities(activities, activity_types)
         else:
             logger.error(f"Error fetching activities: {response.status_code} - {response.text}")
             return []
 
-    def get_activity_streams(self, activity_id: int):
+    def get_activity(self, activity_id: int):
         """
-        Returns stream data (heartrate, velocity) for a specific activity.
+        Returns summary of a single activity (the same fields as in get_activities), None on error.
         """
-        logger.info(f"Getting stream data for activity {activity_id}")
+        logger.info(f"Getting activity {activity_id}")
         headers = {"Authorization": f"Bearer {self.token_manager.get_access_token()}"}
-        response = requests.get(
-            ONE_ACTIVITY_TEMPLATE.format(activity_id), headers=headers, params={"keys": "heartrate,velocity_smooth"}
-        )
+        response = requests.get(self.base_url + ACTIVITY_PATH_TEMPLATE.format(activity_id), headers=headers)
+        self.last_status_code = response.status_code
+        if response.status_code == HTTPStatus.OK:
+            return response.json()
+        logger.error(f"Error fetching activity {activity_id}: {response.status_code} - {response.text}")
+        return None
+
+    @staticmethod
+    def activities_params(start_date: str, end_date: str, page: int = 1) -> dict:
+        """
+        Builds query params of one page of the activities endpoint.
+        """
+        after = int(time.mktime(time.strptime(start_date, "%Y-%m-%d")))
+        before = int(time.mktime(time.strptime(end_date, "%Y-%m-%d")))
+        return {"after": after, "before": before, "per_page": ACTIVITIES_PER_PAGE, "page": page}
+
+    @staticmethod
+    def filter_activities(activities: list, activity_types: Optional[Union[str, List[str]]] = None) -> list:
+        """
+        Keeps only activities of given sport type(s), None keeps all of them.
+        """
+        if activity_types is None:
+            return activities
+        if isinstance(activity_types, str):
+            activity_types = [activity_types]
+
+        filtered_activities = [a for a in activities if a.get("sport_type") in activity_types]
+        logger.info(f"Filtered {len(filtered_activities)} activities of type(s): {activity_types}")
+        return filtered_activities
+
+    @staticmethod
+    def parse_streams_response(activity_id: int, response):
+        """
+        Returns stream data of a successful response (requests or httpx), logs the error and returns None otherwise.
+        """
         if response.status_code == HTTPStatus.OK:
             return response.json()
         elif response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
@@ -76,3 +139,59 @@ class StravaAPI:
             logger.error(f"Error fetching activity stream for {activity_id}: {HTTPStatus(response.status_code)}")
             logger.info(f"{HTTPStatus(response.status_code).description}")
             return None
+
+    @staticmethod
+    def is_retryable_status(status_code: Optional[int]) -> bool:
+        """
+        Checks if a failed request may succeed later: rate limit, server errors or no response at all.
+        Other client errors (e.g. deleted or private activity) will fail the same way again.
+        """
+        return status_code is None or status_code == HTTPStatus.TOO_MANY_REQUESTS or status_code >= 500
+
+    @staticmethod
+    def stream_params(profile: str = DEFAULT_STREAM_PROFILE) -> dict:
+        """
+        Builds query params of the streams endpoint for given stream profile.
+
+        :param profile: Name of the profile defined in STREAM_PROFILES (e.g. "trend", "detail")
+        :return: Dictionary with 'keys', 'key_by_type', 'resolution' and 'series_type' params
+        """
+        if profile not in STREAM_PROFILES:
+            raise ValueError(f"Unknown stream profile: {profile}. Available: {list(STREAM_PROFILES)}")
+        settings = STREAM_PROFILES[profile]
+        return {
+            "keys": ",".join(settings["keys"]),
+            "key_by_type": "true",
+            "resolution": settings["resolution"],
+            "series_type": settings["series_type"],
+        }
+
+    @staticmethod
+    def is_profile_sufficient(stored_profile: Optional[str], requested_profile: str) -> bool:
+        """
+        Checks if streams stored with one profile cover what the requested profile would fetch.
+        Streams stored before profiles were introduced (None) are treated as the cheapest profile.
+        """
+        if stored_profile == FIT_STREAM_PROFILE:
+            return True
+        if stored_profile is None:
+            stored_rank = min(profile["rank"] for profile in STREAM_PROFILES.values())
+        else:
+            stored_rank = STREAM_PROFILES.get(stored_profile, {"rank": -1})["rank"]
+        return stored_rank >= STREAM_PROFILES[requested_profile]["rank"]
+
+    def get_activity_streams(self, activity_id: int, profile: str = DEFAULT_STREAM_PROFILE):
+        """
+        Returns stream data (heartrate, velocity, ...) for a specific activity.
+
+        :param activity_id: Strava activity id
+        :param profile: Stream profile deciding keys and resolution, see STREAM_PROFILES
+        """
+        logger.info(f"Getting {profile} stream data for activity {activity_id}")
+        params = self.stream_params(profile)
+        headers = {"Authorization": f"Bearer {self.token_manager.get_access_token()}"}
+        response = requests.get(
+            self.base_url + STREAMS_PATH_TEMPLATE.format(activity_id), headers=headers, params=params
+        )
+        self.last_status_code = response.status_code
+        return self.parse_streams_response(activity_id, response)
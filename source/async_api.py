@@ -0,0 +1,156 @@
+import asyncio
+from http import HTTPStatus
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Union
+
+import httpx
+from loguru import logger
+
+from source.api import (
+    ACTIVITIES_PATH,
+    ACTIVITIES_PER_PAGE,
+    API_BASE_URL,
+    DEFAULT_STREAM_PROFILE,
+    STREAMS_PATH_TEMPLATE,
+    StravaAPI,
+)
+from source.token_manager import TokenManager
+
+# Strava allows 100 requests per 15 minutes, there is no gain in more parallel connections.
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30.0
+
+
+class AsyncStravaAPI:
+    """
+    Asyncio counterpart of StravaAPI built on httpx.AsyncClient, with the same get_activities and
+    get_activity_streams surface. Use it as an async context manager to close the connection pool:
+
+        async with AsyncStravaAPI(token_manager) as api:
+            activities = await api.get_activities("2025-01-01", "2025-02-01", "Run")
+            streams = await api.get_activity_streams_batch([a["id"] for a in activities])
+    """
+
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        base_url: str = API_BASE_URL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        :param token_manager: Token manager shared with other clients
+        :param base_url: Strava API base url, may point to a local stand-in server
+        :param max_concurrency: Maximal number of requests in flight in get_activity_streams_batch
+        :param client: Optional; preconfigured client (e.g. with a mock transport), closed by the owner
+        """
+        self.token_manager = token_manager
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=DEFAULT_TIMEOUT)
+
+    async def __aenter__(self) -> "AsyncStravaAPI":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {await self.token_manager.get_access_token_async(self.client)}"}
+
+    async def _iter_pages(self, start_date: str, end_date: str) -> AsyncIterator[Optional[list]]:
+        """
+        Yields raw pages of activities, None (as the last item) when a request fails.
+        """
+        page = 1
+        while True:
+            response = await self.client.get(
+                self.base_url + ACTIVITIES_PATH,
+                headers=await self._headers(),
+                params=StravaAPI.activities_params(start_date, end_date, page),
+            )
+            if response.status_code != HTTPStatus.OK:
+                logger.error(f"Error fetching activities: {response.status_code} - {response.text}")
+                yield None
+                return
+            batch = response.json()
+            yield batch
+            if len(batch) < ACTIVITIES_PER_PAGE:
+                return
+            page += 1
+
+    async def iter_activities(
+        self, start_date: str, end_date: str, activity_types: Optional[Union[str, List[str]]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Yields user activities within a date range page by page, the next page is requested only
+        when the previous one is consumed. Iteration stops at the first failed page, so activities
+        of earlier pages may already have been yielded; use get_activities for all-or-nothing results.
+
+        :param start_date: Start date in 'YYYY-MM-DD'
+        :param end_date: End date in 'YYYY-MM-DD'
+        :param activity_types: Optional; str or list of activity types (e.g. "Run", ["Run", "Squash"])
+        """
+        async for batch in self._iter_pages(start_date, end_date):
+            if batch is None:
+                return
+            for activity in StravaAPI.filter_activities(batch, activity_types):
+                yield activity
+
+    async def get_activities(
+        self, start_date: str, end_date: str, activity_types: Optional[Union[str, List[str]]] = None
+    ) -> list:
+        """
+        Take user activities within a date range. Like StravaAPI.get_activities, an empty list is returned
+        when any page fails, so a partial range is never mistaken for a complete one.
+
+        :param start_date: Start date in 'YYYY-MM-DD'
+        :param end_date: End date in 'YYYY-MM-DD'
+        :param activity_types: Optional; str or list of activity types (e.g. "Run", ["Run", "Squash"])
+        :return: List of filtered activities
+        """
+        logger.info(f"Getting {activity_types} activities from {start_date} to {end_date}")
+        activities = []
+        async for batch in self._iter_pages(start_date, end_date):
+            if batch is None:
+                return []
+            activities.extend(batch)
+        logger.success("Successfully retrieved activities.")
+        return StravaAPI.filter_activities(activities, activity_types)
+
+    async def get_activity_streams(self, activity_id: int, profile: str = DEFAULT_STREAM_PROFILE):
+        """
+        Returns stream data (heartrate, velocity, ...) for a specific activity.
+
+        :param activity_id: Strava activity id
+        :param profile: Stream profile deciding keys and resolution, see STREAM_PROFILES
+        """
+        logger.info(f"Getting {profile} stream data for activity {activity_id}")
+        response = await self.client.get(
+            self.base_url + STREAMS_PATH_TEMPLATE.format(activity_id),
+            headers=await self._headers(),
+            params=StravaAPI.stream_params(profile),
+        )
+        return StravaAPI.parse_streams_response(activity_id, response)
+
+    async def get_activity_streams_batch(
+        self, activity_ids: Iterable[int], profile: str = DEFAULT_STREAM_PROFILE
+    ) -> Dict[int, Optional[dict]]:
+        """
+        Fetches streams of many activities concurrently, at most max_concurrency requests at a time.
+
+        :return: Dictionary of activity id -> stream data (None for failed requests)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(activity_id):
+            async with semaphore:
+                return await self.get_activity_streams(activity_id, profile)
+
+        activity_ids = list(activity_ids)
+        streams = await asyncio.gather(*(fetch(activity_id) for activity_id in activity_ids))
+        return dict(zip(activity_ids, streams))
@@ -0,0 +1,93 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+BEST_EFFORT_DISTANCES = (1000, 5000, 10000)
+SPLIT_DISTANCE = 1000
+
+
+def _monotonic(distance: np.ndarray) -> np.ndarray:
+    # GPS distance may go slightly back after corrections, prefix maximum keeps it sortable.
+    return np.maximum.accumulate(distance)
+
+
+def best_efforts(
+    distance: np.ndarray, time: np.ndarray, targets: Sequence[int] = BEST_EFFORT_DISTANCES
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Finds the fastest segment of each target distance.
+
+    Every sample is taken as a window start. Window ends of all targets are found with a single
+    np.searchsorted call over cumulative distance (binary search, not a two-pointer scan), and the time at
+    the exact end distance is interpolated linearly. The cost is O(n * k * log n) time and O(n * k) memory
+    for n samples and k targets, in one vectorized pass over the activity without comparing segment pairs.
+
+    :param distance: Cumulative distance stream in meters
+    :param time: Time stream in seconds
+    :param targets: Effort distances in meters
+    :return: Dictionary of distance -> (elapsed seconds, start offset in seconds), targets longer
+             than the activity are skipped
+    """
+    distance = _monotonic(np.asarray(distance, dtype=float))
+    time = np.asarray(time, dtype=float)
+    targets = [target for target in targets if target > 0]
+    if len(distance) < 2 or not targets:
+        return {}
+    end_distance = distance[:, None] + np.asarray(targets, dtype=float)
+    reachable = end_distance <= distance[-1]
+    # distance[end - 1] < end_distance <= distance[end] for reachable ends, only unreachable ones (masked below)
+    # may divide by zero.
+    end = np.clip(np.searchsorted(distance, end_distance), 1, len(distance) - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (end_distance - distance[end - 1]) / (distance[end] - distance[end - 1])
+    end_time = time[end - 1] + ratio * (time[end] - time[end - 1])
+    elapsed = np.where(reachable, end_time - time[:, None], np.inf)
+
+    efforts = {}
+    best = np.argmin(elapsed, axis=0)
+    for column, target in enumerate(targets):
+        if reachable[best[column], column]:
+            efforts[target] = (float(elapsed[best[column], column]), float(time[best[column]] - time[0]))
+    return efforts
+
+
+def splits(
+    distance: np.ndarray,
+    time: np.ndarray,
+    heartrate: np.ndarray = None,
+    moving: np.ndarray = None,
+    split_distance: int = SPLIT_DISTANCE,
+):
+    """
+    Calculates elapsed time and time weighted average heart rate of every full split (e.g. kilometre).
+
+    Times at split boundaries are interpolated from cumulative distance and heart rate averages come from
+    a prefix sum of heart rate over time, so all splits are computed in a single pass.
+
+    :param heartrate: Optional; heart rate cleaned by stream_cleaning.clean_streams, NaN for gaps
+    :param moving: Optional; mask of moving samples, stopped time is left out of heart rate averages
+    :return: Tuple of arrays: elapsed seconds and average heart rates (NaN without heart rate data)
+    """
+    distance = _monotonic(np.asarray(distance, dtype=float))
+    time = np.asarray(time, dtype=float)
+    count = int(distance[-1] // split_distance) if len(distance) > 1 else 0
+    if not count:
+        return np.array([]), np.array([])
+    boundaries = np.concatenate(([distance[0]], np.arange(1, count + 1) * split_distance))
+    boundary_times = np.interp(boundaries, distance, time)
+    elapsed = np.diff(boundary_times)
+
+    average_hr = np.full(count, np.nan)
+    if heartrate is not None and len(heartrate) == len(time):
+        heartrate = np.asarray(heartrate, dtype=float)
+        valid = ~np.isnan(heartrate)
+        if moving is not None and len(moving) == len(time):
+            valid &= np.asarray(moving, dtype=bool)
+        dt = np.diff(time, prepend=time[0])
+        hr_prefix = np.cumsum(np.where(valid, heartrate, 0) * dt)
+        valid_prefix = np.cumsum(valid * dt)
+        hr_integral = np.diff(np.interp(boundary_times, time, hr_prefix))
+        valid_time = np.diff(np.interp(boundary_times, time, valid_prefix))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_hr = np.where(valid_time > 0, hr_integral / valid_time, np.nan)
+    return elapsed, average_hr
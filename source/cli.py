@@ -0,0 +1,398 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from loguru import logger
+
+from source.best_efforts import BEST_EFFORT_DISTANCES
+from source.common import DataAnalyzer, time_converter_from_iso
+from source.database import DataBaseEditor
+from source.decimation import MIN_LTTB_POINTS, to_chart_payload
+from source.trends import PERIODS, TrendAnalyzer
+
+# Heavy dependencies (requests, matplotlib with Qt, garmin SDK) are imported inside the subcommands using them.
+
+DEFAULT_CACHE_DIR = "db_files"
+DEFAULT_WORKERS = 4
+DEFAULT_SYNC_DAYS = 30
+HISTORY_START = "2000-01-01"
+MAX_PLOT_POINTS = 1000
+TREND_CACHE_PATTERN = "trend_*.npz"
+WEBHOOK_RETRY_DELAY = 60
+
+
+def _today() -> str:
+    return date.today().isoformat()
+
+
+def _tomorrow() -> str:
+    return (date.today() + timedelta(days=1)).isoformat()
+
+
+def _max_points(value: str) -> int:
+    points = int(value)
+    if points < MIN_LTTB_POINTS:
+        raise argparse.ArgumentTypeError(f"must be at least {MIN_LTTB_POINTS}")
+    return points
+
+
+def emit(args, payload: dict):
+    """
+    Prints command result as JSON (--json) or logs it line by line.
+    """
+    if args.json:
+        print(json.dumps(payload, default=str))
+    else:
+        for key, value in payload.items():
+            logger.info(f"{key}: {value}")
+
+
+def invalidate_trend_cache(cache_dir: str):
+    """
+    Removes cached trend states, they are extended only with activities newer than the cached ones,
+    so inserting older activities requires computing them from scratch.
+    """
+    for path in glob.glob(os.path.join(cache_dir, TREND_CACHE_PATTERN)):
+        os.remove(path)
+        logger.info(f"Removed outdated trend cache {path}")
+
+
+def _create_api(args):
+    from source.api import DEFAULT_STREAM_PROFILE, StravaAPI
+    from source.token_manager import TokenManager
+
+    args.profile = args.profile or DEFAULT_STREAM_PROFILE
+    return StravaAPI(TokenManager(args.env_file))
+
+
+def store_activities(args, api, db, activities) -> dict:
+    """
+    Fetches streams of new activities (and of activities stored with a poorer profile) using a thread pool
+    and stores them. Database writes stay in the main thread. Failed requests (including network errors)
+    are counted, so one bad activity does not abort the whole batch.
+    """
+    import requests
+
+    stored = {act["id"] for act in activities if db.check_if_data_exist(act["id"], log_skipped=False)}
+    to_fetch = []
+    for act in activities:
+        if act["id"] not in stored:
+            to_fetch.append(act)
+        elif not api.is_profile_sufficient(db.get_stream_profile(act["id"]), args.profile):
+            logger.info(f"Activity with id {act['id']} will be upgraded to '{args.profile}' streams.")
+            to_fetch.append(act)
+        else:
+            logger.info(f"Activity with id {act['id']} already exists in database. Fetching skipped.")
+
+    def fetch(act):
+        try:
+            return api.get_activity_streams(act["id"], args.profile)
+        except requests.RequestException as e:
+            logger.error(f"Error fetching activity stream for {act['id']}: {e}")
+            return None
+
+    newest_stored = db.latest_start_date()
+    # Refresh the token once before the workers start, so they do not race to rotate it.
+    api.token_manager.get_access_token()
+    added, upgraded, failed = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for act, stream in zip(to_fetch, pool.map(fetch, to_fetch)):
+            if stream is None:
+                failed += 1
+            elif act["id"] in stored:
+                upgraded += db.update_activity_streams(act["id"], stream, args.profile)
+            elif db.add_activity_to_db(act, stream, args.profile):
+                added += 1
+                if newest_stored and time_converter_from_iso(act["start_date"]) < newest_stored:
+                    invalidate_trend_cache(args.cache_dir)
+    if upgraded:
+        # Upgraded streams change moving averages and quality flags of already cached activities.
+        invalidate_trend_cache(args.cache_dir)
+    return {"found": len(activities), "added": added, "upgraded": upgraded, "failed": failed}
+
+
+def cmd_sync(args, db):
+    latest = db.latest_start_date()
+    start_date = latest[:10] if latest else (date.today() - timedelta(days=DEFAULT_SYNC_DAYS)).isoformat()
+    api = _create_api(args)
+    activities = api.get_activities(start_date, _tomorrow(), args.types)
+    emit(args, {"from": start_date, **store_activities(args, api, db, activities)})
+
+
+def cmd_backfill(args, db):
+    api = _create_api(args)
+    activities = api.get_activities(args.start, args.end, args.types)
+    emit(args, {"from": args.start, "to": args.end, **store_activities(args, api, db, activities)})
+
+
+def _decode_fit_file(path: str):
+    from extra_tools.fit_file_decoder import FitFileDecoder
+
+    try:
+        return FitFileDecoder(path).to_activity()
+    except (ValueError, KeyError, FileNotFoundError) as e:
+        logger.error(f"Skipping {path}: {e}")
+        return None
+
+
+def cmd_import_fit(args, db):
+    from source.api import FIT_STREAM_PROFILE
+
+    paths = sorted(glob.glob(os.path.join(args.directory, "*.fit")) + glob.glob(os.path.join(args.directory, "*.FIT")))
+    added, skipped = 0, 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for decoded in pool.map(_decode_fit_file, paths):
+            if decoded is None or db.check_if_data_exist(decoded[0]["id"]):
+                skipped += 1
+            elif db.add_activity_to_db(*decoded, FIT_STREAM_PROFILE):
+                added += 1
+    if added:
+        invalidate_trend_cache(args.cache_dir)
+    emit(args, {"files": len(paths), "added": added, "skipped": skipped})
+
+
+def _trend_cache_path(args) -> str:
+    return os.path.join(
+        args.cache_dir,
+        TREND_CACHE_PATTERN.replace("*", f"{args.hr_min}_{args.hr_max}_{args.period}_{args.reference_hr}"),
+    )
+
+
+def cmd_analyze(args, db):
+    cache_path = _trend_cache_path(args)
+    if os.path.exists(cache_path):
+        trend = TrendAnalyzer.load(cache_path)
+    else:
+        trend = TrendAnalyzer(period=args.period, reference_hr=args.reference_hr)
+
+    last_cached = trend.dates[-1] if len(trend) else None
+    start_date = str(last_cached.astype("datetime64[D]")) if last_cached is not None else HISTORY_START
+    db.clean_missing_activities()
+    data = db.read_data_in_hr_range(start_date, _tomorrow(), args.hr_min, args.hr_max, skip_low_quality=True)
+    if last_cached is not None:
+        data = data[data.start_date > last_cached]
+    if data:
+        trend.update(*DataAnalyzer(data).extract_date_pace_and_hr())
+        trend.save(cache_path)
+
+    in_range = (trend.dates >= datetime.fromisoformat(args.start)) & (
+        trend.dates < datetime.fromisoformat(args.end) + timedelta(days=1)
+    )
+    periods, pace_at_hr = trend.pace_at_reference_hr()
+    period_in_range = (periods >= datetime.fromisoformat(args.start).date()) & (
+        periods <= datetime.fromisoformat(args.end).date()
+    )
+    dates = trend.dates[in_range]
+    emit(
+        args,
+        {
+            "activities": int(in_range.sum()),
+            "pace": to_chart_payload(dates, trend.paces[in_range], args.max_points),
+            "rolling_mean": to_chart_payload(dates, trend.rolling[in_range], args.max_points),
+            "ewma": to_chart_payload(dates, trend.ewma[in_range], args.max_points),
+            "pace_at_hr": to_chart_payload(periods[period_in_range], pace_at_hr[period_in_range], args.max_points),
+        },
+    )
+
+    if args.plot and in_range.any():
+        from source.common import Plot
+
+        plot = Plot(dates, trend.paces[in_range], max_points=args.max_points)
+        plot.add_series(dates, trend.ewma[in_range], f"EWMA (span {trend.span})")
+        plot.add_series(periods[period_in_range], pace_at_hr[period_in_range], f"Pace at {trend.reference_hr} bpm")
+        plot.show_plot()
+
+
+def cmd_efforts(args, db):
+    db.compute_missing_efforts(tuple(args.distances))
+    best = {
+        distance: [
+            {"activity_id": activity_id, "start_date": start_date, "elapsed_time": elapsed, "start_offset": offset}
+            for activity_id, start_date, elapsed, offset in db.read_best_efforts(distance, args.limit)
+        ]
+        for distance in args.distances
+    }
+    split_rows = db.read_splits_in_hr_range(args.start, args.end, args.hr_min, args.hr_max)
+    split_times = [row[3] for row in split_rows]
+    emit(
+        args,
+        {
+            "best_efforts": best,
+            "splits_in_hr_range": len(split_rows),
+            "average_split_time": sum(split_times) / len(split_times) if split_times else None,
+        },
+    )
+
+
+def cmd_webhook(args, db):
+    from werkzeug.serving import make_server
+
+    from source.webhook import WEBHOOK_PATH, IngestQueue, WebhookIngestor, create_app
+
+    api = _create_api(args)
+    queue = IngestQueue()
+    ingestor = WebhookIngestor(api, db, queue, args.types, args.profile)
+    # The HTTP server only enqueues events, the database is used from this thread only.
+    server = make_server(args.host, args.port, create_app(queue, args.verify_token), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Listening for Strava events on http://{args.host}:{args.port}{WEBHOOK_PATH}")
+    try:
+        while True:
+            if not queue.wait(timeout=1.0):
+                continue
+            newest_stored = db.latest_start_date()
+            counts = ingestor.process_pending()
+            backdated = newest_stored and ingestor.oldest_added and ingestor.oldest_added < newest_stored
+            if counts["updated"] or counts["deleted"] or backdated:
+                invalidate_trend_cache(args.cache_dir)
+            if counts["failed"]:
+                logger.warning(f"Retrying failed activities in {args.retry_delay} seconds.")
+                time.sleep(args.retry_delay)
+    except KeyboardInterrupt:
+        logger.info("Stopping webhook receiver.")
+    finally:
+        server.shutdown()
+
+
+def cmd_export(args, db):
+    activities = db.iter_activities(args.start, args.end, args.with_streams)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        count = 0
+        for activity in activities:
+            output.write(json.dumps(activity) + "\n")
+            count += 1
+    finally:
+        if args.output:
+            output.close()
+    logger.info(f"Exported {count} activities.")
+
+
+def cmd_bench(args, db):
+    import numpy as np
+
+    from source.decimation import decimate
+    from source.stream_cleaning import clean_streams
+
+    rng = np.random.default_rng(0)
+    dates = np.datetime64("2015-01-01T07:00") + np.arange(args.activities) * np.timedelta64(1, "D")
+    heart_rates = rng.uniform(120, 170, args.activities)
+    paces = 9 - heart_rates / 40 + rng.normal(0, 0.1, args.activities)
+    velocity = np.clip(rng.normal(3, 0.5, args.samples), 0, None)
+    velocity[rng.integers(0, args.samples, args.samples // 100)] = 50
+    streams = {
+        "velocity_smooth": {"data": velocity.tolist()},
+        "heartrate": {"data": rng.integers(0, 180, args.samples).tolist()},
+        "time": {"data": list(range(args.samples))},
+    }
+
+    benchmarks = {
+        "trend_update": lambda: TrendAnalyzer().update(dates, paces, heart_rates),
+        "decimate_lttb": lambda: decimate(dates, paces, MAX_PLOT_POINTS, "lttb"),
+        "decimate_minmax": lambda: decimate(dates, paces, MAX_PLOT_POINTS, "minmax"),
+        "clean_streams": lambda: clean_streams(streams),
+        "db_read": lambda: db.read_data_in_hr_range(HISTORY_START, _tomorrow(), args.hr_min, args.hr_max),
+    }
+    results = {}
+    for name, function in benchmarks.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "best_ms": round(min(timings) * 1000, 3),
+            "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+        }
+    emit(args, {"activities": args.activities, "samples": args.samples, "results": results})
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="strava-pace", description="Strava pace analyzer.")
+    parser.add_argument("--db", help="Path to SQLite database (default: <cache-dir>/trainings.db)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for database and trend cache")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel downloads / decoders")
+    parser.add_argument("--env-file", default=".env", help="File with Strava tokens")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--log-level", default="INFO", help="Logging level, logs are written to stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, function, help_text in (
+        ("sync", cmd_sync, "Download activities newer than the last stored one"),
+        ("backfill", cmd_backfill, "Download activities within a date range"),
+    ):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.set_defaults(function=function)
+        sub.add_argument("--profile", help="Stream profile: 'trend' (cheap, low resolution) or 'detail' (default)")
+        sub.add_argument("--types", nargs="+", default=["Run"], help="Activity types to store")
+        if name == "backfill":
+            sub.add_argument("--from", dest="start", required=True, help="Start date YYYY-MM-DD")
+            sub.add_argument("--to", dest="end", default=_today(), help="End date YYYY-MM-DD")
+
+    sub = subparsers.add_parser("import-fit", help="Import Garmin FIT files from a directory")
+    sub.set_defaults(function=cmd_import_fit)
+    sub.add_argument("directory")
+
+    sub = subparsers.add_parser("analyze", help="Pace trends of activities within heart rate range")
+    sub.set_defaults(function=cmd_analyze)
+    sub.add_argument("--from", dest="start", default=HISTORY_START, help="Start date YYYY-MM-DD")
+    sub.add_argument("--to", dest="end", default=_today(), help="End date YYYY-MM-DD")
+    sub.add_argument("--hr-min", type=int, default=60)
+    sub.add_argument("--hr-max", type=int, default=155)
+    sub.add_argument("--period", choices=PERIODS, default="week")
+    sub.add_argument("--reference-hr", type=int, default=140)
+    sub.add_argument("--max-points", type=_max_points, default=MAX_PLOT_POINTS)
+    sub.add_argument("--plot", action="store_true", help="Show the plot window")
+
+    sub = subparsers.add_parser("efforts", help="Best efforts and per-kilometre splits within heart rate range")
+    sub.set_defaults(function=cmd_efforts)
+    sub.add_argument("--distances", type=int, nargs="+", default=list(BEST_EFFORT_DISTANCES), help="Meters")
+    sub.add_argument("--limit", type=int, default=5, help="Number of best efforts per distance")
+    sub.add_argument("--from", dest="start", default=HISTORY_START, help="Start date YYYY-MM-DD")
+    sub.add_argument("--to", dest="end", default=_today(), help="End date YYYY-MM-DD")
+    sub.add_argument("--hr-min", type=int, default=60)
+    sub.add_argument("--hr-max", type=int, default=155)
+
+    sub = subparsers.add_parser("webhook", help="Receive Strava push events and ingest changed activities")
+    sub.set_defaults(function=cmd_webhook)
+    sub.add_argument("--verify-token", required=True, help="Token used when creating the push subscription")
+    sub.add_argument("--host", default="127.0.0.1")
+    sub.add_argument("--port", type=int, default=8000)
+    sub.add_argument("--profile", help="Stream profile: 'trend' (cheap, low resolution) or 'detail' (default)")
+    sub.add_argument("--types", nargs="+", default=["Run"], help="Activity types to store")
+    sub.add_argument("--retry-delay", type=int, default=WEBHOOK_RETRY_DELAY, help="Seconds before retrying failures")
+
+    sub = subparsers.add_parser("export", help="Export activities as JSON lines")
+    sub.set_defaults(function=cmd_export)
+    sub.add_argument("--from", dest="start", default=HISTORY_START, help="Start date YYYY-MM-DD")
+    sub.add_argument("--to", dest="end", default=_today(), help="End date YYYY-MM-DD")
+    sub.add_argument("--output", help="Output file, stdout by default")
+    sub.add_argument("--with-streams", action="store_true", help="Include raw streams")
+
+    sub = subparsers.add_parser("bench", help="Measure analytics pipeline on synthetic data")
+    sub.set_defaults(function=cmd_bench)
+    sub.add_argument("--activities", type=int, default=10_000)
+    sub.add_argument("--samples", type=int, default=50_000)
+    sub.add_argument("--repeat", type=int, default=5)
+    sub.add_argument("--hr-min", type=int, default=60)
+    sub.add_argument("--hr-max", type=int, default=210)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    db = DataBaseEditor(args.db or os.path.join(args.cache_dir, "trainings.db"))
+    try:
+        args.function(args, db)
+    finally:
+        db.conn.close()
@@ -1,9 +1,9 @@
 from datetime import datetime
-import matplotlib
-matplotlib.use("Qt5Agg")
-import matplotlib.pyplot as plt
 
-from extra_tools.fit_file_decoder import FitFileDecoder as fit_decoder
+from source.decimation import decimate
+
+PLOT_BACKEND = "Qt5Agg"
+
 
 def time_converter_from_iso(date_time):
     dt = datetime.fromisoformat(date_time.replace("Z", "+00:00"))
@@ -12,30 +12,65 @@ def time_converter_from_iso(date_time):
 
 class DataAnalyzer:
     def __init__(self, activities_data):
+        """
+        :param activities_data: ActivityRecords returned by DataBaseEditor range reads
+        """
         if not activities_data:
             raise ValueError("Cannot perform analyzing on empty data.")
         self.activities_data = activities_data
 
-    def extract_date_and_hr(self):
-        ms_to_kmh = 3.6
-        pace = lambda x: str(fit_decoder.pace_calculate(x * ms_to_kmh)).replace("0:", "", 1)
-        date = lambda x: datetime.strptime(x, "%Y-%m-%d %H:%M:%S")
-        return [(date(activity[2]), pace(activity[5])) for activity in self.activities_data]
+    def extract_date_and_pace(self):
+        """
+        Returns dates (datetime64) and average paces in min/km of activities.
+        """
+        return self.activities_data.start_date, self.activities_data.pace
 
-    @staticmethod
-    def mmss_to_minutes(time):
-        m, s = map(int, time.split(":"))
-        return m + s / 60
+    def extract_date_pace_and_hr(self):
+        """
+        Returns dates, average paces in min/km and average heart rates of activities as separate arrays,
+        the input expected by TrendAnalyzer.update.
+        """
+        return self.activities_data.start_date, self.activities_data.pace, self.activities_data.average_heartrate
 
 
 class Plot:
-    def __init__(self, dates, time):
+    def __init__(self, dates, time, max_points=None, method="lttb"):
+        """
+        :param dates: Dates of activities
+        :param time: Paces in min/km
+        :param max_points: Optional; caps the number of drawn points of every series
+        :param method: Decimation method used with max_points, "lttb" or "minmax"
+        """
         self.dates = dates
         self.time = time
+        self.max_points = max_points
+        self.method = method
+        self.series = []
+
+    def _prepare(self, dates, values):
+        if self.max_points is None:
+            return dates, values
+        return decimate(dates, values, self.max_points, self.method)
+
+    def add_series(self, dates, values, label):
+        """
+        Adds an extra line (e.g. trend from TrendAnalyzer) drawn over the pace points.
+        """
+        self.series.append((dates, values, label))
 
     def show_plot(self):
+        # matplotlib and Qt are imported only when a plot is really shown, it keeps the CLI startup fast.
+        import matplotlib
+
+        matplotlib.use(PLOT_BACKEND)
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 5))
-        plt.plot(self.dates, self.time, marker="o", linestyle="-")
+        plt.plot(*self._prepare(self.dates, self.time), marker="o", linestyle="-", label="Pace")
+        for dates, values, label in self.series:
+            plt.plot(*self._prepare(dates, values), linestyle="-", linewidth=2, label=label)
+        if self.series:
+            plt.legend()
         plt.ylim(8, 4)
         plt.title("Pace in time")
         plt.xlabel("Date")
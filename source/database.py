@@ -2,13 +2,38 @@ import json
 import os
 import sqlite3
 from datetime import datetime
-from typing import Union
+from typing import Iterator, Optional, Union
 
+import numpy as np
 from loguru import logger
 
+from source.best_efforts import BEST_EFFORT_DISTANCES, best_efforts, splits
 from source.common import time_converter_from_iso
+from source.dedup import START_TOLERANCE, Fingerprint
+from source.records import ActivityRecords
+from source.stream_cleaning import clean_streams, stream_arrays
 
 db_path = os.path.join(os.getcwd(), "db_files", "trainings.db")
+FETCH_BATCH_SIZE = 500
+
+# Columns added after the first release, created on the fly in databases made by older versions.
+EXTRA_COLUMNS = {
+    "stream_profile": "TEXT",
+    "clean_data": "TEXT",
+    "low_quality": "INTEGER",
+    "efforts_computed": "INTEGER",
+    "start_epoch": "INTEGER",
+    "elapsed_time": "REAL",
+    "sample_count": "INTEGER",
+    "moving_average_speed": "REAL",
+    "moving_average_heartrate": "REAL",
+}
+# Range reads select records.RECORD_COLUMNS with averages over moving time computed at ingest,
+# Strava summary values are used when streams had no velocity.
+HEARTRATE_EXPRESSION = "COALESCE(moving_average_heartrate, average_heartrate)"
+RECORD_SELECT = ", ".join(
+    ("activity_id", "start_date", HEARTRATE_EXPRESSION, "COALESCE(moving_average_speed, average_speed)", "low_quality")
+)
 
 
 class DataBaseEditor:
@@ -29,20 +54,101 @@ class DataBaseEditor:
             json_data TEXT
             )
         """)
+        added_columns = self._add_missing_columns()
+        if "moving_average_speed" in added_columns:
+            # Rows cleaned before the summary columns existed already have the averages in 'clean_data'.
+            self.cursor.execute(
+                "UPDATE trainings SET "
+                "moving_average_speed = json_extract(clean_data, '$.quality.moving_average_speed'), "
+                "moving_average_heartrate = json_extract(clean_data, '$.quality.moving_average_heartrate') "
+                "WHERE clean_data IS NOT NULL"
+            )
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_trainings_activity_id ON trainings (activity_id)")
+        self._create_dedup_index()
+        self._create_effort_tables()
         self.conn.commit()
 
-    def check_if_data_exist(self, activity_id: int) -> bool:
+    def _create_dedup_index(self):
+        # Rows stored before deduplication get start time from 'start_date', their sample count stays unknown.
+        self.cursor.execute(
+            "UPDATE trainings SET start_epoch = CAST(strftime('%s', start_date) AS INTEGER) WHERE start_epoch IS NULL"
+        )
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_trainings_start_epoch ON trainings (start_epoch)")
+        # Ids of duplicates merged into another stored activity, so they are not fetched again.
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS activity_aliases (
+            alias_id INTEGER PRIMARY KEY,
+            activity_id INTEGER
+            )
+        """)
+
+    def _create_effort_tables(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS best_efforts (
+            activity_id INTEGER,
+            distance INTEGER,
+            elapsed_time REAL,
+            start_offset REAL,
+            PRIMARY KEY (activity_id, distance)
+            )
+        """)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_best_efforts_distance ON best_efforts (distance, elapsed_time)"
+        )
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS splits (
+            activity_id INTEGER,
+            split INTEGER,
+            elapsed_time REAL,
+            average_heartrate REAL,
+            PRIMARY KEY (activity_id, split)
+            )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_splits_heartrate ON splits (average_heartrate)")
+
+    def _add_missing_columns(self) -> set:
+        self.cursor.execute("PRAGMA table_info(trainings)")
+        existing = {row[1] for row in self.cursor.fetchall()}
+        added = set()
+        for column, column_type in EXTRA_COLUMNS.items():
+            if column not in existing:
+                logger.info(f"Adding missing column '{column}' to trainings table.")
+                self.cursor.execute(f"ALTER TABLE trainings ADD COLUMN {column} {column_type}")
+                added.add(column)
+        return added
+
+    @staticmethod
+    def _cleaned_values(data) -> tuple:
+        """
+        Cleans streams and returns values of 'clean_data', 'low_quality', 'moving_average_speed'
+        and 'moving_average_heartrate' columns.
+        """
+        cleaned = clean_streams(data)
+        quality = cleaned["quality"]
+        return (
+            json.dumps(cleaned),
+            quality["low_quality"],
+            quality.get("moving_average_speed"),
+            quality.get("moving_average_heartrate"),
+        )
+
+    def check_if_data_exist(self, activity_id: int, log_skipped: bool = True) -> bool:
         """
-        Checks if a record with the given activity ID exists in the 'trainings' table.
+        Checks if a record with the given activity ID exists in the 'trainings' table
+        or was merged into another activity as a duplicate.
         Args:
             activity_id (int): The ID of the activity to check.
+            log_skipped (bool): Log that fetching of an existing activity is skipped.
         Returns:
             bool: True if the record exists, False otherwise.
         """
         try:
-            self.cursor.execute("SELECT 1 FROM trainings WHERE activity_id = ?", (activity_id,))
+            self.cursor.execute(
+                "SELECT 1 FROM trainings WHERE activity_id = ? UNION ALL SELECT 1 FROM activity_aliases WHERE alias_id = ?",
+                (activity_id, activity_id),
+            )
             is_exists = bool(self.cursor.fetchone())
-            if is_exists:
+            if is_exists and log_skipped:
                 logger.info(f"Activity with id {activity_id} already exists in database. Fetching skipped.")
             return is_exists
         except sqlite3.OperationalError as e:
@@ -52,7 +158,7 @@ class DataBaseEditor:
             else:
                 raise
 
-    def add_activity_to_db(self, activity, data) -> bool:
+    def add_activity_to_db(self, activity, data, stream_profile: Optional[str] = None) -> bool:
         """
         Inserts a new activity record into the 'trainings' table in the database.
 
@@ -60,22 +166,39 @@ class DataBaseEditor:
             activity (dict): A dictionary containing basic activity data.
                              Expected keys: 'id', 'sport_type', 'average_heartrate', 'average_speed'.
             data (dict): Additional activity data to be stored as JSON in the 'json_data' column.
+            stream_profile (str, optional): Name of the stream profile which produced `data`.
+
+        Activities already stored from another source (matched by start time and duration, see dedup.Fingerprint)
+        are merged: the copy with higher sampling resolution is kept and the other id is stored as its alias.
+
+        Streams are cleaned once here (see stream_cleaning.clean_streams), cleaned arrays are stored in
+        'clean_data' column, averages over moving time in 'moving_average_speed' and 'moving_average_heartrate'
+        columns and activities with poor data are flagged in 'low_quality' column.
 
         Commits the transaction after insertion. Logs a success message if the insert was successful,
         otherwise logs a warning.
 
         Returns:
             bool: True if the activity was successfully inserted into the database,
-                  False if the insertion failed.
+                  False if the insertion failed or a better copy of the activity is already stored.
         """
         try:
+            fingerprint = Fingerprint.from_activity(activity, data)
+            duplicate_id = self.find_duplicate(fingerprint, activity["id"])
+            if duplicate_id is not None and not self._is_better_copy(fingerprint, duplicate_id):
+                self._add_alias(activity["id"], duplicate_id)
+                logger.info(f"Activity {activity['id']} is a duplicate of stored activity {duplicate_id}, skipped.")
+                return False
             self.cursor.execute(
                 "INSERT INTO trainings "
                 "(activity_id, "
                 "start_date, "
                 "sport_type, "
                 "average_heartrate, "
-                "average_speed, json_data) VALUES (?, ?, ?, ?, ?, ?)",
+                "average_speed, json_data, stream_profile, "
+                "clean_data, low_quality, moving_average_speed, moving_average_heartrate, "
+                "start_epoch, elapsed_time, sample_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
                 (
                     activity["id"],
                     time_converter_from_iso(activity["start_date"]),
@@ -83,9 +206,21 @@ class DataBaseEditor:
                     activity["average_heartrate"],
                     activity["average_speed"],
                     json.dumps(data),
+                    stream_profile,
+                    *self._cleaned_values(data),
+                    fingerprint.start_epoch,
+                    fingerprint.elapsed_time,
+                    fingerprint.sample_count,
                 ),
             )
             self.conn.commit()
+            if duplicate_id is not None:
+                logger.info(f"Activity {activity['id']} replaces lower resolution duplicate {duplicate_id}.")
+                self.cursor.execute(
+                    "UPDATE activity_aliases SET activity_id = ? WHERE activity_id = ?", (activity["id"], duplicate_id)
+                )
+                self.delete_activity(duplicate_id)
+                self._add_alias(duplicate_id, activity["id"])
             if self.cursor.lastrowid is not None:
                 logger.success("Successfully added activity to database.")
                 return True
@@ -96,6 +231,296 @@ class DataBaseEditor:
             logger.warning("Failed to add activity to database.", e)
             return False
 
+    def find_duplicate(self, fingerprint: Fingerprint, activity_id: Optional[int] = None) -> Optional[int]:
+        """
+        Looks for a stored activity with matching fingerprint. Candidates come from the start time index,
+        so the lookup cost does not grow with the number of stored activities.
+
+        Args:
+            fingerprint (Fingerprint): Fingerprint of the incoming activity.
+            activity_id (int, optional): ID of the incoming activity, excluded from candidates.
+        Returns:
+            int: ID of the matching activity, None if there is no duplicate.
+        """
+        self.cursor.execute(
+            "SELECT activity_id, start_epoch, elapsed_time, COALESCE(sample_count, 0) FROM trainings "
+            "WHERE start_epoch BETWEEN ? AND ? AND activity_id IS NOT ?",
+            (fingerprint.start_epoch - START_TOLERANCE, fingerprint.start_epoch + START_TOLERANCE, activity_id),
+        )
+        for candidate_id, *candidate in self.cursor.fetchall():
+            if fingerprint.matches(Fingerprint(*candidate)):
+                return candidate_id
+        return None
+
+    def _is_better_copy(self, fingerprint: Fingerprint, stored_id: int) -> bool:
+        self.cursor.execute(
+            "SELECT start_epoch, elapsed_time, COALESCE(sample_count, 0) FROM trainings WHERE activity_id = ?",
+            (stored_id,),
+        )
+        return fingerprint.resolution > Fingerprint(*self.cursor.fetchone()).resolution
+
+    def _add_alias(self, alias_id: int, activity_id: int):
+        self.cursor.execute("INSERT OR REPLACE INTO activity_aliases VALUES (?, ?)", (alias_id, activity_id))
+        self.conn.commit()
+
+    def get_stream_profile(self, activity_id: int) -> Optional[str]:
+        """
+        Returns the name of the stream profile stored for the activity (or the activity it was merged into).
+
+        Args:
+            activity_id (int): The ID of the activity.
+        Returns:
+            str: Profile name, None if the activity is missing or was stored without a profile.
+        """
+        self.cursor.execute(
+            "SELECT stream_profile FROM trainings WHERE activity_id = "
+            "COALESCE((SELECT activity_id FROM activity_aliases WHERE alias_id = ?), ?)",
+            (activity_id, activity_id),
+        )
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def update_activity_streams(self, activity_id: int, data, stream_profile: str) -> bool:
+        """
+        Replaces stored stream data of an existing activity, e.g. after upgrading it to a richer profile.
+
+        Args:
+            activity_id (int): The ID of the activity to update.
+            data (dict): New stream data stored as JSON in the 'json_data' column.
+            stream_profile (str): Name of the stream profile which produced `data`.
+        Returns:
+            bool: True if a record was updated, False otherwise.
+        """
+        self.cursor.execute("SELECT start_date, elapsed_time FROM trainings WHERE activity_id = ?", (activity_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            logger.warning(f"Activity {activity_id} not found, streams not updated.")
+            return False
+        # Sampling resolution decides which copy of a duplicate is kept, so it has to follow the new streams.
+        fingerprint = Fingerprint.from_activity({"start_date": row[0], "elapsed_time": row[1]}, data)
+        # New streams may bring distance and time, efforts are computed again on next compute_missing_efforts.
+        self.cursor.execute("DELETE FROM best_efforts WHERE activity_id = ?", (activity_id,))
+        self.cursor.execute("DELETE FROM splits WHERE activity_id = ?", (activity_id,))
+        self.cursor.execute(
+            "UPDATE trainings SET json_data = ?, stream_profile = ?, clean_data = ?, low_quality = ?, "
+            "moving_average_speed = ?, moving_average_heartrate = ?, elapsed_time = ?, sample_count = ?, "
+            "efforts_computed = 0 WHERE activity_id = ?",
+            (
+                json.dumps(data),
+                stream_profile,
+                *self._cleaned_values(data),
+                fingerprint.elapsed_time,
+                fingerprint.sample_count,
+                activity_id,
+            ),
+        )
+        self.conn.commit()
+        logger.success(f"Streams of activity {activity_id} upgraded to '{stream_profile}' profile.")
+        return True
+
+    def update_sport_type(self, activity_id: int, sport_type: str) -> bool:
+        """
+        Changes sport type of a stored activity, e.g. after the athlete edited it.
+
+        Returns:
+            bool: True if a record was updated, False otherwise.
+        """
+        self.cursor.execute("UPDATE trainings SET sport_type = ? WHERE activity_id = ?", (sport_type, activity_id))
+        self.conn.commit()
+        return bool(self.cursor.rowcount)
+
+    def delete_activity(self, activity_id: int) -> bool:
+        """
+        Deletes the activity with its best efforts and splits.
+
+        Returns:
+            bool: True if the activity was deleted, False if it was not stored.
+        """
+        self.cursor.execute("DELETE FROM best_efforts WHERE activity_id = ?", (activity_id,))
+        self.cursor.execute("DELETE FROM splits WHERE activity_id = ?", (activity_id,))
+        self.cursor.execute("DELETE FROM trainings WHERE activity_id = ?", (activity_id,))
+        deleted = bool(self.cursor.rowcount)
+        self.cursor.execute("DELETE FROM activity_aliases WHERE activity_id = ?", (activity_id,))
+        self.conn.commit()
+        if deleted:
+            logger.success(f"Activity {activity_id} deleted from database.")
+        return deleted
+
+    def read_clean_streams(self, activity_id: int) -> Optional[dict]:
+        """
+        Returns cleaned streams stored for the activity.
+
+        Args:
+            activity_id (int): The ID of the activity.
+        Returns:
+            dict: Result of stream_cleaning.clean_streams, None if the activity was not cleaned yet.
+        """
+        self.cursor.execute("SELECT clean_data FROM trainings WHERE activity_id = ?", (activity_id,))
+        row = self.cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def clean_missing_activities(self) -> int:
+        """
+        Cleans streams of activities stored before the cleaning stage was introduced.
+
+        Returns:
+            int: Number of cleaned activities.
+        """
+        self.cursor.execute("SELECT activity_id, json_data FROM trainings WHERE clean_data IS NULL")
+        rows = self.cursor.fetchall()
+        for activity_id, json_data in rows:
+            self.cursor.execute(
+                "UPDATE trainings SET clean_data = ?, low_quality = ?, moving_average_speed = ?, "
+                "moving_average_heartrate = ? WHERE activity_id = ?",
+                (*self._cleaned_values(json.loads(json_data) if json_data else None), activity_id),
+            )
+        self.conn.commit()
+        if rows:
+            logger.success(f"Cleaned streams of {len(rows)} stored activities.")
+        return len(rows)
+
+    def compute_missing_efforts(self, distances=BEST_EFFORT_DISTANCES) -> int:
+        """
+        Calculates best efforts and splits of activities which were not processed yet and stores them
+        in 'best_efforts' and 'splits' tables. Activities processed earlier are visited again only when
+        some of the requested distances were not computed for them.
+
+        Every computed distance gets a 'best_efforts' row, distances longer than the activity (or activities
+        without distance and time streams) get one with NULL elapsed time, so they are not computed again.
+
+        Args:
+            distances (tuple): Best effort distances in meters.
+        Returns:
+            int: Number of processed activities.
+        """
+        distances = sorted(set(distances))
+        placeholders = ", ".join("?" * len(distances))
+        cursor = self.conn.execute(
+            "SELECT activity_id, json_data, clean_data, COALESCE(efforts_computed, 0) FROM trainings t "
+            "WHERE NOT COALESCE(efforts_computed, 0) OR "
+            f"(SELECT COUNT(*) FROM best_efforts e WHERE e.activity_id = t.activity_id AND e.distance IN ({placeholders}))"
+            " < ?",
+            (*distances, len(distances)),
+        )
+        processed = 0
+        while rows := cursor.fetchmany(FETCH_BATCH_SIZE):
+            for activity_id, json_data, clean_data, splits_computed in rows:
+                raw = json.loads(json_data) if json_data else None
+                streams = stream_arrays(raw)
+                distance, time = streams.get("distance"), streams.get("time")
+                has_distance = distance is not None and time is not None and len(distance) == len(time)
+                efforts = best_efforts(distance, time, distances) if has_distance else {}
+                self.cursor.executemany(
+                    "INSERT OR REPLACE INTO best_efforts VALUES (?, ?, ?, ?)",
+                    [(activity_id, target, *efforts.get(target, (None, None))) for target in distances],
+                )
+                if has_distance and not splits_computed:
+                    # Heart rate gaps and stops were resolved at ingest, see add_activity_to_db.
+                    cleaned = json.loads(clean_data) if clean_data else clean_streams(raw)
+                    heartrate = cleaned.get("heartrate")
+                    elapsed, average_hr = splits(
+                        distance,
+                        time,
+                        None if heartrate is None else np.array(heartrate, dtype=float),
+                        cleaned.get("moving"),
+                    )
+                    self.cursor.executemany(
+                        "INSERT OR REPLACE INTO splits VALUES (?, ?, ?, ?)",
+                        [
+                            (activity_id, index + 1, split_time, None if hr != hr else hr)
+                            for index, (split_time, hr) in enumerate(zip(elapsed.tolist(), average_hr.tolist()))
+                        ],
+                    )
+                self.cursor.execute("UPDATE trainings SET efforts_computed = 1 WHERE activity_id = ?", (activity_id,))
+                processed += 1
+        self.conn.commit()
+        if processed:
+            logger.success(f"Computed best efforts and splits of {processed} activities.")
+        return processed
+
+    def read_best_efforts(self, distance: int, limit: int = 10, skip_low_quality: bool = True) -> list:
+        """
+        Returns the fastest efforts of the given distance.
+
+        Args:
+            distance (int): Effort distance in meters.
+            limit (int): Maximal number of returned efforts.
+            skip_low_quality (bool): Leave out activities flagged as low quality, GPS spikes make them too fast.
+        Returns:
+            list: Tuples (activity_id, start_date, elapsed_time, start_offset) sorted from the fastest.
+        """
+        quality_filter = "AND NOT COALESCE(t.low_quality, 0) " if skip_low_quality else ""
+        self.cursor.execute(
+            "SELECT e.activity_id, t.start_date, e.elapsed_time, e.start_offset FROM best_efforts e "
+            "JOIN trainings t ON t.activity_id = e.activity_id WHERE e.distance = ? AND e.elapsed_time IS NOT NULL "
+            f"{quality_filter}ORDER BY e.elapsed_time LIMIT ?",
+            (distance, limit),
+        )
+        return self.cursor.fetchall()
+
+    def read_splits_in_hr_range(
+        self,
+        start_date: str,
+        end_date: str,
+        min_hr: Union[int, float] = 60,
+        max_hr: Union[int, float] = 210,
+        skip_low_quality: bool = True,
+    ) -> list:
+        """
+        Returns splits with average heart rate within the range.
+
+        Args:
+            start_date (str): The start date in the format 'YYYY-MM-DD'.
+            end_date (str): The end date in the format 'YYYY-MM-DD'.
+            min_hr (int | float): Minimal average heart rate of the split.
+            max_hr (int | float): Maximal average heart rate of the split.
+            skip_low_quality (bool): Leave out splits of activities flagged as low quality.
+        Returns:
+            list: Tuples (activity_id, start_date, split, elapsed_time, average_heartrate) ordered by date.
+        """
+        quality_filter = "AND NOT COALESCE(t.low_quality, 0) " if skip_low_quality else ""
+        self.cursor.execute(
+            "SELECT s.activity_id, t.start_date, s.split, s.elapsed_time, s.average_heartrate FROM splits s "
+            "JOIN trainings t ON t.activity_id = s.activity_id "
+            "WHERE s.average_heartrate BETWEEN ? AND ? AND t.start_date BETWEEN ? AND ? "
+            f"{quality_filter}ORDER BY t.start_date, s.split",
+            (min_hr, max_hr, f"{start_date} 00:00:00", f"{end_date} 23:59:59"),
+        )
+        return self.cursor.fetchall()
+
+    def iter_activities(self, start_date: str, end_date: str, with_streams: bool = False) -> Iterator[dict]:
+        """
+        Yields activities within the date range as dictionaries, rows are fetched in batches
+        so big exports do not have to fit in memory.
+
+        Args:
+            start_date (str): The start date in the format 'YYYY-MM-DD'.
+            end_date (str): The end date in the format 'YYYY-MM-DD'.
+            with_streams (bool): Include raw 'json_data' streams.
+        """
+        columns = ["activity_id", "start_date", "sport_type", "average_heartrate", "average_speed"]
+        columns += ["stream_profile", "low_quality"]
+        if with_streams:
+            columns.append("json_data")
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM trainings WHERE start_date BETWEEN ? AND ? ORDER BY start_date",
+            (f"{start_date} 00:00:00", f"{end_date} 23:59:59"),
+        )
+        while rows := cursor.fetchmany(FETCH_BATCH_SIZE):
+            for row in rows:
+                activity = dict(zip(columns, row))
+                if with_streams:
+                    activity["json_data"] = json.loads(activity["json_data"]) if activity["json_data"] else None
+                yield activity
+
+    def latest_start_date(self) -> Optional[str]:
+        """
+        Returns start date ('YYYY-MM-DD HH:MM:SS') of the newest stored activity, None for empty database.
+        """
+        self.cursor.execute("SELECT MAX(start_date) FROM trainings")
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
     def clear_whole_database(self) -> bool:
         """
         Prompts the user for confirmation and deletes the entire 'trainings' table from the database if confirmed.
@@ -110,6 +535,9 @@ class DataBaseEditor:
         decision = input("Would you like to delete all records? (y/n) ")
         if decision == "y":
             self.cursor.execute("DROP TABLE IF EXISTS trainings")
+            self.cursor.execute("DROP TABLE IF EXISTS best_efforts")
+            self.cursor.execute("DROP TABLE IF EXISTS splits")
+            self.cursor.execute("DROP TABLE IF EXISTS activity_aliases")
             self.conn.commit()
             logger.success("Successfully deleted all records.")
             return True
@@ -124,7 +552,7 @@ class DataBaseEditor:
             return []
         return [f"{start_date} 00:00:00", f"{end_date} 23:59:59"]
 
-    def read_data_in_time_range(self, start_date: str, end_date: str) -> Union[list, None]:
+    def read_data_in_time_range(self, start_date: str, end_date: str) -> ActivityRecords:
         """
         Retrieves all training records from the database that fall within the specified date range.
 
@@ -133,42 +561,56 @@ class DataBaseEditor:
             end_date (str): The end date in the format 'YYYY-MM-DD'.
 
         Returns:
-            list: A list of tuples, each representing a training record within the given time range.
+            ActivityRecords: Columnar records within the given time range ordered by start date,
+                             empty when there are no records or dates are invalid.
         """
 
         try:
             start_date, end_date = self._prepare_dates(start_date, end_date)
             datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
             datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
-            self.cursor.execute("SELECT * FROM trainings WHERE start_date BETWEEN ? AND ?", (start_date, end_date))
-            data = self.cursor.fetchall()
-            if data:
-                return data
-            else:
+            self.cursor.execute(
+                f"SELECT {RECORD_SELECT} FROM trainings WHERE start_date BETWEEN ? AND ? ORDER BY start_date",
+                (start_date, end_date),
+            )
+            data = ActivityRecords.from_cursor(self.cursor)
+            if not data:
                 logger.info("Thera are no records within the time range.")
-                return []
+            return data
         except ValueError:
             logger.error("Invalid start and/or end date.")
-            return []
+            return ActivityRecords.empty()
 
     def read_data_in_hr_range(
-        self, start_date: str, end_date: str, min_hr: Union[int, float] = 60, max_hr: Union[int, float] = 210
-    ) -> Union[list, None]:
-        start_date, end_date = self._prepare_dates(start_date, end_date)
+        self,
+        start_date: str,
+        end_date: str,
+        min_hr: Union[int, float] = 60,
+        max_hr: Union[int, float] = 210,
+        skip_low_quality: bool = False,
+    ) -> ActivityRecords:
+        """
+        Retrieves training records within the date range with average heart rate (over moving time when
+        available) within the given limits.
+
+        Returns:
+            ActivityRecords: Columnar records ordered by start date, empty when there are no records
+                             or dates are invalid.
+        """
         try:
+            start_date, end_date = self._prepare_dates(start_date, end_date)
             datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
             datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
+            quality_filter = "AND NOT COALESCE(low_quality, 0) " if skip_low_quality else ""
             self.cursor.execute(
-                "SELECT * FROM trainings WHERE start_date BETWEEN ? AND ? "
-                "AND average_heartrate BETWEEN ? AND ? ORDER BY start_date",
+                f"SELECT {RECORD_SELECT} FROM trainings WHERE start_date BETWEEN ? AND ? "
+                f"AND {HEARTRATE_EXPRESSION} BETWEEN ? AND ? {quality_filter}ORDER BY start_date",
                 (start_date, end_date, min_hr, max_hr),
             )
-            data = self.cursor.fetchall()
-            if data:
-                return data
-            else:
+            data = ActivityRecords.from_cursor(self.cursor)
+            if not data:
                 logger.info("Thera are no records within the time range.")
-                return []
+            return data
         except ValueError:
             logger.error("Invalid start and/or end date.")
-            return []
+            return ActivityRecords.empty()
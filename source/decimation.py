@@ -0,0 +1,129 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+# The smallest point caps the methods can honour: LTTB always keeps first and last point and at least
+# one bucket between them, min/max keeps one pair.
+MIN_LTTB_POINTS = 3
+MIN_MIN_MAX_POINTS = 2
+
+
+def _as_numeric(x) -> np.ndarray:
+    """
+    Converts x values (numbers, datetime or datetime64) to float array used in area calculations.
+    """
+    x = np.asarray(x)
+    if x.dtype == object or np.issubdtype(x.dtype, np.datetime64):
+        x = np.asarray(x, dtype="datetime64[ms]")
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, max_points: int) -> np.ndarray:
+    """
+    Selects points with Largest-Triangle-Three-Buckets algorithm, which keeps the visual shape of a series.
+
+    :param x: X values (numbers or dates), sorted ascending
+    :param y: Y values
+    :param max_points: Maximal number of returned points, at least MIN_LTTB_POINTS
+    :return: Sorted indices of selected points
+    :raises ValueError: If max_points is lower than MIN_LTTB_POINTS
+    """
+    if max_points < MIN_LTTB_POINTS:
+        raise ValueError(f"LTTB needs at least {MIN_LTTB_POINTS} points, got {max_points}.")
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket i of inner points covers [edges[i], edges[i + 1]), first and last points are always kept.
+    edges = (np.arange(max_points - 1) * (n - 2) / (max_points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    prefix_x = np.concatenate(([0.0], np.cumsum(x)))
+    prefix_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    average_x = (prefix_x[edges[1:]] - prefix_x[edges[:-1]]) / counts
+    average_y = (prefix_y[edges[1:]] - prefix_y[edges[:-1]]) / counts
+    # The triangle of the last bucket is closed by the last point instead of the next bucket average.
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        area = np.abs(
+            (x[previous] - next_x[bucket]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max(y, max_points: int) -> np.ndarray:
+    """
+    Splits the series into max_points / 2 buckets and keeps minimum and maximum of each one,
+    so spikes are never lost.
+
+    :param y: Y values
+    :param max_points: Maximal number of returned points, at least MIN_MIN_MAX_POINTS
+    :return: Sorted indices of selected points
+    :raises ValueError: If max_points is lower than MIN_MIN_MAX_POINTS
+    """
+    if max_points < MIN_MIN_MAX_POINTS:
+        raise ValueError(f"Min/max decimation needs at least {MIN_MIN_MAX_POINTS} points, got {max_points}.")
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    filled = ~np.isnan(padded).all(axis=1)
+    offsets = np.arange(buckets)[filled] * size
+    minimums = np.nanargmin(padded[filled], axis=1) + offsets
+    maximums = np.nanargmax(padded[filled], axis=1) + offsets
+    return np.unique(np.concatenate((minimums, maximums)))
+
+
+def decimate(x, y, max_points: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Caps the number of points of a series, non-finite y values are dropped first.
+
+    :param x: X values (numbers or dates), sorted ascending
+    :param y: Y values
+    :param max_points: Maximal number of returned points
+    :param method: "lttb" (visual shape) or "minmax" (keeps extremes)
+    :return: Tuple of decimated x and y arrays
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown decimation method: {method}. Available: {METHODS}")
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        raise ValueError("X and Y must have the same length.")
+    finite = np.isfinite(y)
+    x, y = x[finite], y[finite]
+    indices = lttb(x, y, max_points) if method == "lttb" else min_max(y, max_points)
+    return x[indices], y[indices]
+
+
+def to_chart_payload(x: Sequence, y: Sequence[float], max_points: int, method: str = "lttb") -> dict:
+    """
+    Builds JSON serializable chart series, e.g. for the HTTP layer. Dates are returned in ISO format.
+
+    :return: Dictionary with 'x', 'y' lists and 'total_points' of the original series
+    """
+    decimated_x, decimated_y = decimate(x, y, max_points, method)
+    if decimated_x.dtype == object or np.issubdtype(decimated_x.dtype, np.datetime64):
+        x_values = np.datetime_as_string(decimated_x.astype("datetime64[s]")).tolist()
+    else:
+        x_values = decimated_x.tolist()
+    return {"x": x_values, "y": decimated_y.tolist(), "total_points": len(y)}
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from source.stream_cleaning import stream_arrays
+
+# Garmin and Strava may disagree on start by a few seconds (e.g. auto-start, clock sync).
+START_TOLERANCE = 60
+# Durations differ when one source trims the end of the recording.
+DURATION_TOLERANCE = 60
+DURATION_TOLERANCE_RATIO = 0.05
+
+
+class Fingerprint:
+    """
+    Start time and duration of an activity used to find the same run recorded by different sources,
+    together with sampling resolution deciding which copy is kept.
+    """
+
+    __slots__ = ("start_epoch", "elapsed_time", "sample_count")
+
+    def __init__(self, start_epoch: int, elapsed_time: Optional[float], sample_count: int):
+        self.start_epoch = start_epoch
+        self.elapsed_time = elapsed_time
+        self.sample_count = sample_count
+
+    @classmethod
+    def from_activity(cls, activity: dict, data) -> "Fingerprint":
+        """
+        Builds fingerprint from activity summary (Strava or FitFileDecoder.to_activity) and its streams.
+        Elapsed time falls back to the last value of 'time' stream.
+        """
+        start = datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00"))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        streams = stream_arrays(data)
+        elapsed_time = activity.get("elapsed_time")
+        if elapsed_time is None and len(streams.get("time", [])):
+            elapsed_time = float(streams["time"][-1])
+        sample_count = max((len(stream) for stream in streams.values()), default=0)
+        return cls(int(start.timestamp()), elapsed_time, sample_count)
+
+    @property
+    def resolution(self) -> float:
+        """
+        Samples per second, number of samples when duration is unknown.
+        """
+        if self.elapsed_time:
+            return self.sample_count / self.elapsed_time
+        return float(self.sample_count)
+
+    def matches(self, other: "Fingerprint") -> bool:
+        """
+        Checks if both fingerprints describe the same activity. Unknown duration matches on start time only.
+        """
+        if abs(self.start_epoch - other.start_epoch) > START_TOLERANCE:
+            return False
+        if self.elapsed_time is None or other.elapsed_time is None:
+            return True
+        tolerance = max(DURATION_TOLERANCE, DURATION_TOLERANCE_RATIO * max(self.elapsed_time, other.elapsed_time))
+        return abs(self.elapsed_time - other.elapsed_time) <= tolerance
+
+    def __repr__(self):
+        return f"Fingerprint(start={self.start_epoch}, elapsed={self.elapsed_time}, samples={self.sample_count})"
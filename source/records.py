@@ -0,0 +1,80 @@
+import sqlite3
+
+import numpy as np
+
+# Columns selected from 'trainings' table, in order expected by ActivityRecords.from_cursor.
+RECORD_COLUMNS = ("activity_id", "start_date", "average_heartrate", "average_speed", "low_quality")
+DEFAULT_BATCH_SIZE = 1000
+
+
+def speed_to_pace(speed: np.ndarray) -> np.ndarray:
+    """
+    Converts speed in m/s to pace in min/km, zero or missing speed gives NaN.
+    """
+    speed = np.asarray(speed, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(speed > 0, 1000 / (speed * 60), np.nan)
+
+
+class ActivityRecords:
+    """
+    Columnar container of activity summaries read from the database. Every column is a NumPy array,
+    so no per-activity Python objects are kept and pace never goes through a string representation.
+    """
+
+    __slots__ = ("activity_id", "start_date", "average_heartrate", "average_speed", "low_quality", "pace")
+
+    def __init__(self, activity_id, start_date, average_heartrate, average_speed, low_quality):
+        """
+        :param activity_id: Activity ids (int64)
+        :param start_date: Start dates (datetime64[s])
+        :param average_heartrate: Average heart rates in bpm, NaN when missing
+        :param average_speed: Average speeds in m/s, NaN when missing
+        :param low_quality: Flags of activities with poor stream data
+        """
+        self.activity_id = np.asarray(activity_id, dtype=np.int64)
+        self.start_date = np.asarray(start_date, dtype="datetime64[s]")
+        self.average_heartrate = np.asarray(average_heartrate, dtype=float)
+        self.average_speed = np.asarray(average_speed, dtype=float)
+        self.low_quality = np.asarray(low_quality, dtype=bool)
+        self.pace = speed_to_pace(self.average_speed)
+
+    @classmethod
+    def empty(cls) -> "ActivityRecords":
+        return cls([], [], [], [], [])
+
+    @classmethod
+    def from_cursor(cls, cursor: sqlite3.Cursor, batch_size: int = DEFAULT_BATCH_SIZE) -> "ActivityRecords":
+        """
+        Builds records from an executed cursor selecting RECORD_COLUMNS. Rows are fetched in batches and
+        converted to arrays right away, so the full list of row tuples never exists in memory.
+        """
+        chunks = [[] for _ in RECORD_COLUMNS]
+        while rows := cursor.fetchmany(batch_size):
+            activity_id, start_date, average_heartrate, average_speed, low_quality = zip(*rows)
+            chunks[0].append(np.fromiter(activity_id, dtype=np.int64, count=len(rows)))
+            chunks[1].append(np.array(start_date, dtype="datetime64[s]"))
+            chunks[2].append(np.array(average_heartrate, dtype=float))
+            chunks[3].append(np.array(average_speed, dtype=float))
+            chunks[4].append(np.array([bool(flag) for flag in low_quality]))
+        if not chunks[0]:
+            return cls.empty()
+        return cls(*(np.concatenate(column) for column in chunks))
+
+    def __len__(self):
+        return len(self.activity_id)
+
+    def __getitem__(self, index) -> "ActivityRecords":
+        """
+        Returns a subset of records selected by a boolean mask, slice or index array.
+        """
+        return ActivityRecords(
+            self.activity_id[index],
+            self.start_date[index],
+            self.average_heartrate[index],
+            self.average_speed[index],
+            self.low_quality[index],
+        )
+
+    def __repr__(self):
+        return f"ActivityRecords({len(self)} activities)"
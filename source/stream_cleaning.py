@@ -0,0 +1,149 @@
+from typing import Union
+
+import numpy as np
+
+# Anything faster than ~12 m/s (43 km/h) cannot come from running, it is a GPS spike.
+MAX_VELOCITY = 12.0
+# Below walking speed the athlete is treated as stopped when Strava 'moving' stream is missing.
+MIN_MOVING_VELOCITY = 1.0
+# Heart rate dropouts up to this number of samples are interpolated, longer ones stay as gaps.
+MAX_HR_GAP = 10
+MIN_HR_COVERAGE = 0.8
+MAX_SPIKE_RATIO = 0.05
+MIN_MOVING_RATIO = 0.5
+
+
+def stream_arrays(data: Union[dict, list, None]) -> dict:
+    """
+    Converts streams returned by Strava (keyed by type or as a list of stream objects) to numpy arrays.
+
+    :param data: Stream data as stored in 'json_data' column
+    :return: Dictionary of stream type -> numpy array
+    """
+    if not data:
+        return {}
+    if isinstance(data, list):
+        data = {stream["type"]: stream for stream in data if "type" in stream}
+    return {
+        key: np.asarray(stream["data"], dtype=float)
+        for key, stream in data.items()
+        if isinstance(stream, dict) and isinstance(stream.get("data"), list)
+    }
+
+
+def _runs(mask: np.ndarray):
+    """
+    Returns start and end (exclusive) indices of consecutive True values.
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _interpolate(values: np.ndarray, fill_mask: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    result = values.copy()
+    if fill_mask.any() and valid.any():
+        indices = np.arange(len(values))
+        result[fill_mask] = np.interp(indices[fill_mask], indices[valid], values[valid])
+    return result
+
+
+def clip_velocity(velocity: np.ndarray, max_velocity: float = MAX_VELOCITY):
+    """
+    Replaces physically impossible (or missing) velocities with values interpolated from neighbours.
+
+    :return: Tuple of cleaned velocity and mask of replaced samples
+    """
+    spikes = ~((velocity >= 0) & (velocity <= max_velocity))
+    cleaned = _interpolate(velocity, spikes, ~spikes)
+    if spikes.all():
+        cleaned[:] = 0.0
+    return cleaned, spikes
+
+
+def fill_hr_gaps(heartrate: np.ndarray, max_gap: int = MAX_HR_GAP) -> np.ndarray:
+    """
+    Interpolates heart rate dropouts (zeros or missing samples) not longer than max_gap samples
+    and surrounded by valid values. Remaining dropouts are returned as NaN.
+    """
+    invalid = ~(heartrate > 0)
+    starts, ends = _runs(invalid)
+    short = (ends - starts <= max_gap) & (starts > 0) & (ends < len(heartrate))
+    marks = np.zeros(len(heartrate) + 1, dtype=np.int64)
+    np.add.at(marks, starts[short], 1)
+    np.add.at(marks, ends[short], -1)
+    fill_mask = np.cumsum(marks[:-1]) > 0
+    cleaned = _interpolate(heartrate, fill_mask, ~invalid)
+    cleaned[invalid & ~fill_mask] = np.nan
+    return cleaned
+
+
+def detect_moving(velocity: np.ndarray, moving: np.ndarray = None, min_velocity: float = MIN_MOVING_VELOCITY):
+    """
+    Returns mask of moving samples, Strava 'moving' stream is used when available.
+    """
+    if moving is not None and len(moving) == len(velocity):
+        return moving.astype(bool)
+    return velocity >= min_velocity
+
+
+def clean_streams(data: Union[dict, list, None]) -> dict:
+    """
+    Cleans activity streams once at ingest: detects stops, clips velocity spikes, fills short HR dropouts
+    and flags low quality activities. The result is JSON serializable and meant to be stored next to raw data.
+
+    :param data: Raw stream data returned by StravaAPI.get_activity_streams
+    :return: Dictionary with cleaned 'velocity', 'heartrate' (None for gaps), 'moving' mask and 'quality' info
+    """
+    streams = stream_arrays(data)
+    velocity = streams.get("velocity_smooth")
+    if velocity is None or not len(velocity):
+        return {"quality": {"low_quality": True, "reasons": ["no velocity stream"]}}
+
+    velocity, spikes = clip_velocity(velocity)
+    moving = detect_moving(velocity, streams.get("moving"))
+    reasons = []
+
+    time = streams.get("time")
+    if time is not None and len(time) == len(velocity):
+        weights = np.diff(time, prepend=time[0])
+    else:
+        weights = np.ones_like(velocity)
+    moving_weights = weights * moving
+
+    heartrate = streams.get("heartrate")
+    if heartrate is not None and len(heartrate) == len(velocity):
+        heartrate = fill_hr_gaps(heartrate)
+        hr_valid = ~np.isnan(heartrate)
+        hr_coverage = float(hr_valid.mean())
+        hr_weights = moving_weights * hr_valid
+        moving_average_heartrate = (
+            float(np.sum(np.nan_to_num(heartrate) * hr_weights) / hr_weights.sum()) if hr_weights.sum() else None
+        )
+    else:
+        heartrate, hr_coverage, moving_average_heartrate = None, 0.0, None
+
+    moving_ratio = float(moving.mean())
+    spike_ratio = float(spikes.mean())
+    if hr_coverage < MIN_HR_COVERAGE:
+        reasons.append("heart rate coverage too low")
+    if spike_ratio > MAX_SPIKE_RATIO:
+        reasons.append("too many velocity spikes")
+    if moving_ratio < MIN_MOVING_RATIO:
+        reasons.append("too little moving time")
+
+    return {
+        "velocity": velocity.round(3).tolist(),
+        "heartrate": None if heartrate is None else [None if hr != hr else hr for hr in heartrate.round(1).tolist()],
+        "moving": moving.astype(np.int8).tolist(),
+        "quality": {
+            "low_quality": bool(reasons),
+            "reasons": reasons,
+            "hr_coverage": round(hr_coverage, 3),
+            "spike_count": int(spikes.sum()),
+            "moving_ratio": round(moving_ratio, 3),
+            "moving_average_speed": (
+                float(np.sum(velocity * moving_weights) / moving_weights.sum()) if moving_weights.sum() else None
+            ),
+            "moving_average_heartrate": moving_average_heartrate,
+        },
+    }
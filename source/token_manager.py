@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 from http import HTTPStatus
@@ -16,6 +17,7 @@ class TokenManager:
 
     def __init__(self, env_file=".env"):
         self.env_file = env_file
+        self._refresh_lock = None
         load_dotenv(dotenv_path=self.env_file, override=True)
         self.tokens = self._load_tokens()
 
@@ -51,16 +53,19 @@ class TokenManager:
         Refresh the ACCESS_TOKEN using the REFRESH_TOKEN.
         """
         logger.info("Refreshing access token...")
-        response = requests.post(
-            TOKEN_URL,
-            data={
-                "client_id": self.tokens["CLIENT_ID"],
-                "client_secret": self.tokens["CLIENT_SECRET"],
-                "refresh_token": self.tokens["REFRESH_TOKEN"],
-                "grant_type": "refresh_token",
-            },
-        )
+        response = requests.post(TOKEN_URL, data=self._refresh_data())
 
+        self._store_refreshed_tokens(response)
+
+    def _refresh_data(self) -> dict:
+        return {
+            "client_id": self.tokens["CLIENT_ID"],
+            "client_secret": self.tokens["CLIENT_SECRET"],
+            "refresh_token": self.tokens["REFRESH_TOKEN"],
+            "grant_type": "refresh_token",
+        }
+
+    def _store_refreshed_tokens(self, response):
         if response.status_code == HTTPStatus.OK:
             new_data = response.json()
             new_data["CLIENT_ID"] = self.tokens["CLIENT_ID"]
@@ -76,3 +81,26 @@ class TokenManager:
         if self.is_expired():
             self.refresh_access_token()
         return self.tokens["ACCESS_TOKEN"]
+
+    async def refresh_access_token_async(self, client):
+        """
+        Refresh the ACCESS_TOKEN using the REFRESH_TOKEN with an async HTTP client (e.g. httpx.AsyncClient).
+        """
+        logger.info("Refreshing access token...")
+        response = await client.post(TOKEN_URL, data=self._refresh_data())
+        self._store_refreshed_tokens(response)
+
+    async def get_access_token_async(self, client) -> str:
+        """
+        Async counterpart of get_access_token. Concurrent tasks share one refresh: Strava rotates refresh
+        tokens, so a second refresh with the already used token would fail.
+
+        The lock is bound to the event loop of the first refresh, use one TokenManager per event loop.
+        """
+        if self.is_expired():
+            if getattr(self, "_refresh_lock", None) is None:
+                self._refresh_lock = asyncio.Lock()
+            async with self._refresh_lock:
+                if self.is_expired():
+                    await self.refresh_access_token_async(client)
+        return self.tokens["ACCESS_TOKEN"]
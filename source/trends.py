@@ -0,0 +1,233 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+PERIODS = ("week", "month")
+# Closed-form EWMA uses powers of (1 - alpha), chunks keep them far from float64 under/overflow.
+EWMA_CHUNK_SIZE = 128
+# datetime64 weeks start on Thursday (1970-01-01), shift by 3 days to start them on Monday.
+MONDAY_OFFSET_DAYS = 3
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Calculates a trailing rolling mean with prefix sums, first points use the shorter available window.
+
+    :param values: 1D array of values
+    :param window: Number of samples in the window
+    :return: Array of the same length as values
+    """
+    if window < 1:
+        raise ValueError("Window must be a positive number.")
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (prefix[ends] - prefix[starts]) / (ends - starts)
+
+
+def ewma(values: np.ndarray, span: int, previous: float = np.nan) -> np.ndarray:
+    """
+    Calculates an exponentially weighted moving average (y[t] = (1 - a) * y[t - 1] + a * x[t], a = 2 / (span + 1)).
+
+    :param values: 1D array of values
+    :param span: Span of the average, the bigger the smoother
+    :param previous: Last EWMA value to continue from, NaN starts the average from the first value
+    :return: Array of the same length as values
+    """
+    if span < 1:
+        raise ValueError("Span must be a positive number.")
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    if not len(values):
+        return result
+    if span == 1:
+        return values.copy()
+    alpha = 2 / (span + 1)
+    if np.isnan(previous):
+        previous = values[0]
+    for start in range(0, len(values), EWMA_CHUNK_SIZE):
+        chunk = values[start : start + EWMA_CHUNK_SIZE]
+        decay = (1 - alpha) ** np.arange(1, len(chunk) + 1)
+        result[start : start + len(chunk)] = decay * (previous + alpha * np.cumsum(chunk / decay))
+        previous = result[start + len(chunk) - 1]
+    return result
+
+
+def period_codes(dates: np.ndarray, period: str) -> np.ndarray:
+    """
+    Maps dates to integer codes of the week (starting on Monday) or month they belong to.
+    """
+    if period == "week":
+        days = dates.astype("datetime64[D]").astype(np.int64)
+        return (days + MONDAY_OFFSET_DAYS) // 7
+    if period == "month":
+        return dates.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown period: {period}. Available: {PERIODS}")
+
+
+def period_start(codes: np.ndarray, period: str) -> np.ndarray:
+    """
+    Reverts period_codes, returns the first day of each period.
+    """
+    if period == "week":
+        return (codes * 7 - MONDAY_OFFSET_DAYS).astype("datetime64[D]")
+    return codes.astype("datetime64[M]").astype("datetime64[D]")
+
+
+class TrendAnalyzer:
+    """
+    Keeps per-activity pace and heart rate series together with their trends (rolling mean, EWMA and
+    pace-at-fixed-HR regression per week or month). New activities are merged incrementally, only the
+    new points and the affected periods are computed.
+    """
+
+    def __init__(
+        self, window: int = 7, span: int = 10, period: str = "week", reference_hr: float = 140, min_samples: int = 3
+    ):
+        """
+        :param window: Number of activities in the rolling mean window
+        :param span: Span of the exponentially weighted average
+        :param period: Regression period, "week" or "month"
+        :param reference_hr: Heart rate at which pace is estimated from regression
+        :param min_samples: Minimal number of activities in a period to fit the regression
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}. Available: {PERIODS}")
+        self.window = window
+        self.span = span
+        self.period = period
+        self.reference_hr = reference_hr
+        self.min_samples = min_samples
+
+        self.dates = np.array([], dtype="datetime64[s]")
+        self.paces = np.array([], dtype=float)
+        self.heart_rates = np.array([], dtype=float)
+        self.rolling = np.array([], dtype=float)
+        self.ewma = np.array([], dtype=float)
+        self._prefix = np.zeros(1)
+        # Sufficient statistics of the least squares fit pace ~ hr: n, sum(hr), sum(pace), sum(hr^2), sum(hr*pace).
+        self._period_codes = np.array([], dtype=np.int64)
+        self._period_stats = np.empty((0, 5))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def update(self, dates: Sequence, paces: Sequence[float], heart_rates: Sequence[float]) -> None:
+        """
+        Adds new activities and updates all trends.
+
+        Activities newer than already stored ones are computed incrementally, older ones cause a full
+        recomputation of rolling values (period statistics are always merged incrementally).
+
+        :param dates: Activity dates (datetime or datetime64)
+        :param paces: Average paces in min/km
+        :param heart_rates: Average heart rates in bpm
+        """
+        dates = np.asarray(dates, dtype="datetime64[s]")
+        paces = np.asarray(paces, dtype=float)
+        heart_rates = np.asarray(heart_rates, dtype=float)
+        if not (len(dates) == len(paces) == len(heart_rates)):
+            raise ValueError("Dates, paces and heart rates must have the same length.")
+        valid = np.isfinite(paces) & np.isfinite(heart_rates)
+        dates, paces, heart_rates = dates[valid], paces[valid], heart_rates[valid]
+        if not len(dates):
+            return
+
+        order = np.argsort(dates, kind="stable")
+        dates, paces, heart_rates = dates[order], paces[order], heart_rates[order]
+        self._merge_period_stats(dates, paces, heart_rates)
+
+        if len(self) and dates[0] < self.dates[-1]:
+            logger.info("Activities older than already analyzed ones received, recomputing rolling trends.")
+            self.dates = np.concatenate((self.dates, dates))
+            self.paces = np.concatenate((self.paces, paces))
+            self.heart_rates = np.concatenate((self.heart_rates, heart_rates))
+            order = np.argsort(self.dates, kind="stable")
+            self.dates, self.paces, self.heart_rates = self.dates[order], self.paces[order], self.heart_rates[order]
+            self._prefix = np.zeros(1)
+            self.rolling = np.array([], dtype=float)
+            self.ewma = np.array([], dtype=float)
+            self._append_rolling(self.paces)
+            return
+
+        self.dates = np.concatenate((self.dates, dates))
+        self.paces = np.concatenate((self.paces, paces))
+        self.heart_rates = np.concatenate((self.heart_rates, heart_rates))
+        self._append_rolling(paces)
+
+    def _append_rolling(self, paces: np.ndarray):
+        previous_count = len(self._prefix) - 1
+        self._prefix = np.concatenate((self._prefix, self._prefix[-1] + np.cumsum(paces)))
+        ends = np.arange(previous_count + 1, len(self._prefix))
+        starts = np.maximum(ends - self.window, 0)
+        new_rolling = (self._prefix[ends] - self._prefix[starts]) / (ends - starts)
+        previous_ewma = self.ewma[-1] if len(self.ewma) else np.nan
+        self.rolling = np.concatenate((self.rolling, new_rolling))
+        self.ewma = np.concatenate((self.ewma, ewma(paces, self.span, previous_ewma)))
+
+    def _merge_period_stats(self, dates: np.ndarray, paces: np.ndarray, heart_rates: np.ndarray):
+        codes, inverse = np.unique(period_codes(dates, self.period), return_inverse=True)
+        samples = np.column_stack((np.ones_like(paces), heart_rates, paces, heart_rates**2, heart_rates * paces))
+        stats = np.zeros((len(codes), 5))
+        np.add.at(stats, inverse, samples)
+
+        merged_codes = np.union1d(self._period_codes, codes)
+        merged_stats = np.zeros((len(merged_codes), 5))
+        merged_stats[np.searchsorted(merged_codes, self._period_codes)] += self._period_stats
+        merged_stats[np.searchsorted(merged_codes, codes)] += stats
+        self._period_codes, self._period_stats = merged_codes, merged_stats
+
+    def pace_at_reference_hr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimates pace at the reference heart rate in every period with linear regression pace ~ hr.
+        Periods with too few activities or without heart rate variance get NaN.
+
+        :return: Tuple of period start dates and estimated paces in min/km
+        """
+        n, sum_x, sum_y, sum_xx, sum_xy = self._period_stats.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = n * sum_xx - sum_x**2
+            slope = (n * sum_xy - sum_x * sum_y) / variance
+            intercept = (sum_y - slope * sum_x) / n
+            estimate = intercept + slope * self.reference_hr
+        estimate[(n < self.min_samples) | np.isclose(variance, 0)] = np.nan
+        return period_start(self._period_codes, self.period), estimate
+
+    def save(self, path: str) -> None:
+        """
+        Saves the analyzer state to .npz file, so that next run only needs to add new activities.
+        """
+        np.savez(
+            path,
+            settings=np.array([self.window, self.span, self.reference_hr, self.min_samples], dtype=float),
+            period=np.array(self.period),
+            dates=self.dates,
+            paces=self.paces,
+            heart_rates=self.heart_rates,
+            rolling=self.rolling,
+            ewma=self.ewma,
+            prefix=self._prefix,
+            period_codes=self._period_codes,
+            period_stats=self._period_stats,
+        )
+        logger.info(f"Trend state with {len(self)} activities saved to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "TrendAnalyzer":
+        """
+        Restores the analyzer saved with save().
+        """
+        with np.load(path) as state:
+            window, span, reference_hr, min_samples = state["settings"]
+            analyzer = cls(int(window), int(span), str(state["period"]), reference_hr, int(min_samples))
+            analyzer.dates = state["dates"]
+            analyzer.paces = state["paces"]
+            analyzer.heart_rates = state["heart_rates"]
+            analyzer.rolling = state["rolling"]
+            analyzer.ewma = state["ewma"]
+            analyzer._prefix = state["prefix"]
+            analyzer._period_codes = state["period_codes"]
+            analyzer._period_stats = state["period_stats"]
+        logger.info(f"Trend state with {len(analyzer)} activities loaded from {path}")
+        return analyzer
@@ -0,0 +1,211 @@
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import List, Optional, Tuple
+
+import requests
+from flask import Flask, jsonify, request
+from loguru import logger
+
+from source.api import DEFAULT_STREAM_PROFILE, StravaAPI
+from source.common import time_converter_from_iso
+from source.database import DataBaseEditor
+
+WEBHOOK_PATH = "/webhook"
+ASPECT_TYPES = ("create", "update", "delete")
+# Events still failing after this many rounds (e.g. a long Strava outage) are dropped.
+MAX_ATTEMPTS = 5
+
+
+class IngestQueue:
+    """
+    Thread-safe queue of activity ids waiting for ingestion. Every activity is queued at most once,
+    a later event replaces the pending one (e.g. delete after create skips fetching altogether).
+    """
+
+    def __init__(self):
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def put(self, activity_id: int, aspect_type: str, updates: Optional[dict] = None):
+        with self._condition:
+            updates = dict(updates or {})
+            previous = self._pending.pop(activity_id, None)
+            if previous and previous[0] == "delete" and aspect_type == "update":
+                # Updates of a deleted activity are meaningless, the pending delete must not be lost.
+                aspect_type, updates = previous
+            elif previous and aspect_type == "update":
+                if previous[0] == "create":
+                    # Fetching a new activity brings its latest state, the update is already included.
+                    aspect_type = "create"
+                updates = {**previous[1], **updates}
+            self._pending[activity_id] = (aspect_type, updates)
+            self._condition.notify()
+
+    def retry(self, activity_id: int, aspect_type: str, updates: Optional[dict] = None):
+        """
+        Queues a failed event again unless a newer event for the activity arrived meanwhile.
+        """
+        with self._condition:
+            if activity_id not in self._pending:
+                self._pending[activity_id] = (aspect_type, dict(updates or {}))
+
+    def drain(self) -> List[Tuple[int, str, dict]]:
+        """
+        Returns all pending events (activity id, aspect type, updates) and clears the queue.
+        """
+        with self._condition:
+            events = [(activity_id, *event) for activity_id, event in self._pending.items()]
+            self._pending.clear()
+            return events
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until an event is pending or timeout passes, returns True if there are pending events.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: bool(self._pending), timeout)
+
+
+def create_app(queue: IngestQueue, verify_token: str) -> Flask:
+    """
+    Creates Flask app receiving Strava push subscription events. The request handlers only validate
+    and enqueue events, all API calls and database writes happen in WebhookIngestor.
+
+    :param queue: Queue shared with WebhookIngestor
+    :param verify_token: Token given to Strava when creating the subscription
+    """
+    app = Flask(__name__)
+
+    @app.get(WEBHOOK_PATH)
+    def validate_subscription():
+        if request.args.get("hub.mode") != "subscribe" or request.args.get("hub.verify_token") != verify_token:
+            logger.warning("Rejected webhook subscription validation with invalid token.")
+            return jsonify({"error": "invalid verify token"}), HTTPStatus.FORBIDDEN
+        logger.success("Webhook subscription validated.")
+        return jsonify({"hub.challenge": request.args.get("hub.challenge")})
+
+    @app.post(WEBHOOK_PATH)
+    def receive_event():
+        event = request.get_json(silent=True) or {}
+        if event.get("object_type") != "activity" or event.get("aspect_type") not in ASPECT_TYPES:
+            logger.info(f"Ignoring webhook event: {event.get('object_type')} {event.get('aspect_type')}")
+            return "", HTTPStatus.OK
+        try:
+            activity_id = int(event["object_id"])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "missing object_id"}), HTTPStatus.BAD_REQUEST
+        logger.info(f"Webhook event: {event['aspect_type']} activity {activity_id}")
+        queue.put(activity_id, event["aspect_type"], event.get("updates"))
+        # Strava expects the answer within 2 seconds, the work is done by the ingestor.
+        return "", HTTPStatus.OK
+
+    return app
+
+
+class WebhookIngestor:
+    """
+    Applies queued webhook events to the database: new activities are fetched (summary and streams),
+    sport type changes are applied without any API call and deleted activities are removed.
+
+    Requests failing with rate limit, server or network errors are retried up to MAX_ATTEMPTS times,
+    other errors (deleted, private or foreign activity) drop the event right away.
+    """
+
+    def __init__(
+        self,
+        api: StravaAPI,
+        db: DataBaseEditor,
+        queue: IngestQueue,
+        activity_types: Optional[List[str]] = None,
+        stream_profile: str = DEFAULT_STREAM_PROFILE,
+    ):
+        """
+        :param api: Strava API client
+        :param db: Database editor, used only from the thread calling process_pending
+        :param queue: Queue filled by the webhook app
+        :param activity_types: Optional; sport types to store, None stores all of them
+        :param stream_profile: Stream profile of fetched activities
+        """
+        self.api = api
+        self.db = db
+        self.queue = queue
+        self.activity_types = activity_types
+        self.stream_profile = stream_profile
+        # Start date ('YYYY-MM-DD HH:MM:SS') of the oldest activity added by the last process_pending call.
+        self.oldest_added = None
+        self._attempts = {}
+
+    def _is_tracked(self, sport_type: Optional[str]) -> bool:
+        return self.activity_types is None or sport_type in self.activity_types
+
+    def _request_failed(self) -> str:
+        return "failed" if self.api.is_retryable_status(self.api.last_status_code) else "skipped"
+
+    def _create(self, activity_id: int) -> str:
+        if self.db.check_if_data_exist(activity_id):
+            return "skipped"
+        try:
+            activity = self.api.get_activity(activity_id)
+            if activity is None:
+                return self._request_failed()
+            if not self._is_tracked(activity.get("sport_type")):
+                return "skipped"
+            stream = self.api.get_activity_streams(activity_id, self.stream_profile)
+            if stream is None:
+                return self._request_failed()
+        except requests.RequestException as e:
+            logger.error(f"Error fetching activity {activity_id}: {e}")
+            return "failed"
+        # Activities rejected by the database (e.g. without heart rate) are not retried.
+        if not self.db.add_activity_to_db(activity, stream, self.stream_profile):
+            return "skipped"
+        start_date = time_converter_from_iso(activity["start_date"])
+        self.oldest_added = min(start_date, self.oldest_added or start_date)
+        return "added"
+
+    def _update(self, activity_id: int, updates: dict) -> str:
+        sport_type = updates.get("sport_type") or updates.get("type")
+        if not sport_type:
+            return "skipped"
+        if not self._is_tracked(sport_type):
+            # E.g. a Run changed to Walk in a database limited to runs.
+            return "deleted" if self.db.delete_activity(activity_id) else "skipped"
+        if not self.db.check_if_data_exist(activity_id):
+            # Skipped at creation (e.g. Ride changed to Run), fetched now.
+            return self._create(activity_id)
+        return "updated" if self.db.update_sport_type(activity_id, sport_type) else "skipped"
+
+    def process_pending(self) -> dict:
+        """
+        Processes all pending events. Events which failed with a transient error (e.g. rate limit)
+        are queued again, at most MAX_ATTEMPTS times.
+
+        :return: Dictionary with numbers of added, updated, deleted, skipped and failed activities
+        """
+        counts = dict.fromkeys(("added", "updated", "deleted", "skipped", "failed"), 0)
+        self.oldest_added = None
+        for activity_id, aspect_type, updates in self.queue.drain():
+            if aspect_type == "create":
+                result = self._create(activity_id)
+            elif aspect_type == "update":
+                result = self._update(activity_id, updates)
+            else:
+                result = "deleted" if self.db.delete_activity(activity_id) else "skipped"
+            counts[result] += 1
+            if result != "failed":
+                self._attempts.pop(activity_id, None)
+                continue
+            self._attempts[activity_id] = self._attempts.get(activity_id, 0) + 1
+            if self._attempts[activity_id] < MAX_ATTEMPTS:
+                self.queue.retry(activity_id, aspect_type, updates)
+            else:
+                logger.error(f"Dropping {aspect_type} event of activity {activity_id} after {MAX_ATTEMPTS} attempts.")
+                del self._attempts[activity_id]
+        if any(counts.values()):
+            logger.info(f"Webhook ingestion: {counts}")
+        return counts
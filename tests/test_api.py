@@ -3,7 +3,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from source.api import StravaAPI
+from source.api import ACTIVITIES_PER_PAGE, StravaAPI
 
 
 @pytest.fixture
@@ -73,3 +73,82 @@ def test_get_activity_streams_fail(mock_get, token_manager_mock):
     api = StravaAPI(token_manager_mock)
     result = api.get_activity_streams(111)
     assert result is None
+
+
+@patch("source.api.requests.get")
+def test_get_activity_streams_profile_params(mock_get, token_manager_mock):
+    mock_response = MagicMock()
+    mock_response.status_code = HTTPStatus.OK.value
+    mock_get.return_value = mock_response
+
+    api = StravaAPI(token_manager_mock)
+    api.get_activity_streams(111, "trend")
+    params = mock_get.call_args.kwargs["params"]
+    assert params["resolution"] == "low"
+    assert "time" not in params["keys"].split(",")
+
+    api.get_activity_streams(111, "detail")
+    params = mock_get.call_args.kwargs["params"]
+    assert params["resolution"] == "high"
+    assert {"time", "distance", "heartrate", "velocity_smooth"} <= set(params["keys"].split(","))
+
+
+def test_stream_params_unknown_profile():
+    with pytest.raises(ValueError):
+        StravaAPI.stream_params("ultra")
+
+
+def test_is_profile_sufficient():
+    assert StravaAPI.is_profile_sufficient("detail", "trend")
+    assert StravaAPI.is_profile_sufficient("trend", "trend")
+    assert not StravaAPI.is_profile_sufficient("trend", "detail")
+    assert StravaAPI.is_profile_sufficient(None, "trend")
+    assert not StravaAPI.is_profile_sufficient(None, "detail")
+    assert not StravaAPI.is_profile_sufficient("unknown", "trend")
+    assert StravaAPI.is_profile_sufficient("fit", "detail")
+
+
+@patch("source.api.requests.get")
+def test_get_activities_pagination(mock_get, token_manager_mock):
+    full_page = MagicMock(status_code=HTTPStatus.OK.value)
+    full_page.json.return_value = [{"id": i, "sport_type": "Run"} for i in range(ACTIVITIES_PER_PAGE)]
+    last_page = MagicMock(status_code=HTTPStatus.OK.value)
+    last_page.json.return_value = [{"id": -1, "sport_type": "Run"}]
+    mock_get.side_effect = [full_page, last_page]
+
+    api = StravaAPI(token_manager_mock)
+    result = api.get_activities("2025-01-01", "2025-01-02")
+    assert len(result) == ACTIVITIES_PER_PAGE + 1
+    assert [c.kwargs["params"]["page"] for c in mock_get.call_args_list] == [1, 2]
+
+
+@patch("source.api.requests.get")
+def test_get_activities_fail_on_later_page(mock_get, token_manager_mock):
+    full_page = MagicMock(status_code=HTTPStatus.OK.value)
+    full_page.json.return_value = [{"id": i, "sport_type": "Run"} for i in range(ACTIVITIES_PER_PAGE)]
+    mock_get.side_effect = [full_page, MagicMock(status_code=HTTPStatus.INTERNAL_SERVER_ERROR.value)]
+
+    assert StravaAPI(token_manager_mock).get_activities("2025-01-01", "2025-01-02") == []
+
+
+@patch("source.api.requests.get")
+def test_get_activity(mock_get, token_manager_mock):
+    mock_response = MagicMock(status_code=HTTPStatus.OK.value)
+    mock_response.json.return_value = {"id": 111, "sport_type": "Run"}
+    mock_get.return_value = mock_response
+
+    api = StravaAPI(token_manager_mock)
+    assert api.get_activity(111) == {"id": 111, "sport_type": "Run"}
+    assert mock_get.call_args.args[0].endswith("/activities/111")
+
+    mock_response.status_code = HTTPStatus.NOT_FOUND.value
+    assert api.get_activity(111) is None
+    assert api.last_status_code == HTTPStatus.NOT_FOUND
+
+
+def test_is_retryable_status():
+    assert StravaAPI.is_retryable_status(HTTPStatus.TOO_MANY_REQUESTS)
+    assert StravaAPI.is_retryable_status(HTTPStatus.BAD_GATEWAY)
+    assert StravaAPI.is_retryable_status(None)
+    assert not StravaAPI.is_retryable_status(HTTPStatus.NOT_FOUND)
+    assert not StravaAPI.is_retryable_status(HTTPStatus.FORBIDDEN)
@@ -0,0 +1,147 @@
+import asyncio
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from source.api import ACTIVITIES_PER_PAGE
+from source.async_api import AsyncStravaAPI
+from source.token_manager import TOKEN_URL, TokenManager
+
+
+@pytest.fixture
+def token_manager_mock():
+    mock = MagicMock()
+
+    async def get_access_token_async(client):
+        return "fake_access_token"
+
+    mock.get_access_token_async.side_effect = get_access_token_async
+    return mock
+
+
+def make_api(token_manager, handler, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncStravaAPI(token_manager, base_url="http://strava.test", client=client, **kwargs)
+
+
+def test_get_activities_paginates_and_filters(token_manager_mock):
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer fake_access_token"
+        page = int(request.url.params["page"])
+        count = ACTIVITIES_PER_PAGE if page == 1 else 3
+        return httpx.Response(200, json=[{"id": i, "sport_type": "Run" if i % 2 else "Ride"} for i in range(count)])
+
+    async def run():
+        api = make_api(token_manager_mock, handler)
+        return await api.get_activities("2025-01-01", "2025-01-02", "Run")
+
+    activities = asyncio.run(run())
+    assert len(activities) == ACTIVITIES_PER_PAGE // 2 + 1
+    assert all(activity["sport_type"] == "Run" for activity in activities)
+
+
+def test_get_activities_fail(token_manager_mock):
+    async def run():
+        api = make_api(token_manager_mock, lambda request: httpx.Response(500, text="error"))
+        return await api.get_activities("2025-01-01", "2025-01-02")
+
+    assert asyncio.run(run()) == []
+
+
+def failing_second_page(request):
+    if request.url.params["page"] == "2":
+        return httpx.Response(500, text="error")
+    return httpx.Response(200, json=[{"id": i, "sport_type": "Run"} for i in range(ACTIVITIES_PER_PAGE)])
+
+
+def test_get_activities_fail_on_later_page(token_manager_mock):
+    async def run():
+        api = make_api(token_manager_mock, failing_second_page)
+        partial = [activity async for activity in api.iter_activities("2025-01-01", "2025-01-02")]
+        return partial, await api.get_activities("2025-01-01", "2025-01-02")
+
+    partial, activities = asyncio.run(run())
+    assert len(partial) == ACTIVITIES_PER_PAGE
+    # Same contract as the blocking StravaAPI.get_activities.
+    assert activities == []
+
+
+def test_get_activity_streams(token_manager_mock):
+    def handler(request):
+        if request.url.path == "/activities/404/streams":
+            return httpx.Response(HTTPStatus.NOT_FOUND)
+        if request.url.path == "/activities/429/streams":
+            return httpx.Response(HTTPStatus.TOO_MANY_REQUESTS)
+        assert request.url.params["resolution"] == "low"
+        return httpx.Response(200, json={"heartrate": {"data": [100, 110]}})
+
+    async def run():
+        api = make_api(token_manager_mock, handler)
+        return await api.get_activity_streams_batch([1, 404, 429], "trend")
+
+    assert asyncio.run(run()) == {1: {"heartrate": {"data": [100, 110]}}, 404: None, 429: None}
+
+
+def test_get_activity_streams_batch_respects_concurrency(token_manager_mock):
+    in_flight, peak = 0, 0
+
+    async def run():
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={})
+
+        api = make_api(token_manager_mock, handler, max_concurrency=3)
+        return await api.get_activity_streams_batch(range(20))
+
+    assert len(asyncio.run(run())) == 20
+    assert peak == 3
+
+
+def test_concurrent_token_refresh_happens_once():
+    tm = TokenManager.__new__(TokenManager)
+    tm.tokens = {
+        "CLIENT_ID": 123,
+        "CLIENT_SECRET": "secret",
+        "ACCESS_TOKEN": "old",
+        "REFRESH_TOKEN": "refresh",
+        "EXPIRES_AT": 0,
+    }
+    refreshes = []
+
+    async def handler(request):
+        refreshes.append(request)
+        assert str(request.url) == TOKEN_URL
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"access_token": "new", "expires_at": 2**31})
+
+    def save_tokens(data):
+        tm.saved = data
+
+    def load_tokens():
+        return {**tm.tokens, "ACCESS_TOKEN": tm.saved["access_token"], "EXPIRES_AT": tm.saved["expires_at"]}
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return await asyncio.gather(*(tm.get_access_token_async(client) for _ in range(5)))
+
+    with patch.object(tm, "_save_tokens", side_effect=save_tokens), patch.object(tm, "_load_tokens", load_tokens):
+        assert asyncio.run(run()) == ["new"] * 5
+    assert len(refreshes) == 1
+
+
+def test_async_token_refresh_fail():
+    tm = TokenManager.__new__(TokenManager)
+    tm.tokens = {"CLIENT_ID": 1, "CLIENT_SECRET": "s", "ACCESS_TOKEN": "a", "REFRESH_TOKEN": "r", "EXPIRES_AT": 0}
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(400, text="bad")))
+        return await tm.get_access_token_async(client)
+
+    with pytest.raises(Exception, match="Unable to refresh access token."):
+        asyncio.run(run())
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from source.best_efforts import best_efforts, splits
+
+
+def naive_best_effort(distance, time, target):
+    best = None
+    for i in range(len(distance)):
+        for j in range(i + 1, len(distance)):
+            if distance[j] - distance[i] >= target:
+                elapsed = time[j] - time[i]
+                best = elapsed if best is None else min(best, elapsed)
+                break
+    return best
+
+
+@pytest.fixture
+def run_streams():
+    # 1 Hz, 3 m/s with a faster middle part at 5 m/s.
+    speed = np.full(3000, 3.0)
+    speed[1000:1400] = 5.0
+    time = np.arange(len(speed), dtype=float)
+    distance = np.concatenate(([0.0], np.cumsum(speed[1:])))
+    return distance, time
+
+
+def test_best_efforts(run_streams):
+    distance, time = run_streams
+    efforts = best_efforts(distance, time, (1000, 2000, 100_000))
+    assert efforts[1000][0] == pytest.approx(200)
+    assert efforts[1000][1] == pytest.approx(1000, abs=200)
+    assert efforts[2000][0] == pytest.approx(400)
+    assert 100_000 not in efforts
+
+
+def test_best_efforts_match_naive_scan():
+    rng = np.random.default_rng(0)
+    time = np.arange(400, dtype=float)
+    distance = np.cumsum(rng.uniform(2, 4, len(time)))
+    distance[::50] = np.round(distance[::50])
+    for target in (100, 500):
+        naive = naive_best_effort(distance, time, target)
+        assert best_efforts(distance, time, (target,))[target][0] <= naive
+
+
+def test_best_efforts_with_stops(recwarn):
+    # Distance does not grow while stopped, also at the very end of the activity.
+    distance = np.array([0.0, 400, 400, 800, 1200, 1200, 1200])
+    time = np.arange(len(distance), dtype=float) * 100
+    efforts = best_efforts(distance, time, (400, 1000, 2000))
+    assert efforts[400] == (100.0, 0.0)
+    assert efforts[1000][0] == pytest.approx(350)
+    assert 2000 not in efforts
+    assert not recwarn.list
+
+
+def test_best_efforts_short_streams():
+    assert best_efforts([0.0], [0.0]) == {}
+
+
+def test_splits_with_heart_rate():
+    time = np.arange(1001, dtype=float)
+    distance = time * 4.0
+    heartrate = np.where(time < 250, 140.0, 160.0)
+    heartrate[300:305] = np.nan
+    elapsed, average_hr = splits(distance, time, heartrate)
+    assert elapsed.tolist() == pytest.approx([250, 250, 250, 250])
+    assert average_hr[0] == pytest.approx(140, abs=0.1)
+    assert average_hr[1:].tolist() == pytest.approx([160, 160, 160], abs=0.1)
+
+
+def test_splits_skip_stopped_heart_rate():
+    time = np.arange(1001, dtype=float)
+    distance = time * 4.0
+    heartrate = np.where(time < 100, 100.0, 150.0)
+    moving = time >= 100
+    _, average_hr = splits(distance, time, heartrate, moving)
+    assert average_hr[0] == pytest.approx(150, abs=0.1)
+
+
+def test_splits_without_heart_rate():
+    elapsed, average_hr = splits(np.array([0.0, 1500.0]), np.array([0.0, 300.0]))
+    assert elapsed.tolist() == pytest.approx([200])
+    assert np.isnan(average_hr).all()
+    assert len(splits(np.array([0.0, 500.0]), np.array([0.0, 100.0]))[0]) == 0
@@ -0,0 +1,168 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from source.cli import build_parser, main
+from source.database import DataBaseEditor
+from source.webhook import IngestQueue
+
+
+def make_activity(activity_id, start_date, heartrate=140.0, speed=3.0):
+    activity = {
+        "id": activity_id,
+        "start_date": start_date,
+        "sport_type": "Run",
+        "average_heartrate": heartrate,
+        "average_speed": speed,
+    }
+    streams = {"velocity_smooth": {"data": [speed] * 20}, "heartrate": {"data": [heartrate] * 20}}
+    return activity, streams
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    db = DataBaseEditor(str(tmp_path / "trainings.db"))
+    for day in range(1, 21):
+        db.add_activity_to_db(*make_activity(day, f"2025-06-{day:02d}T07:00:00Z", 130 + day, 2.5 + day / 20))
+    db.conn.close()
+    return tmp_path
+
+
+def run(capsys, *argv):
+    main(list(argv))
+    return json.loads(capsys.readouterr().out)
+
+
+def test_parser_requires_command():
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+
+
+def test_analyze_rejects_too_few_max_points():
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["analyze", "--max-points", "2"])
+    assert build_parser().parse_args(["analyze", "--max-points", "3"]).max_points == 3
+
+
+def test_analyze_uses_trend_cache(capsys, cache_dir):
+    result = run(capsys, "--cache-dir", str(cache_dir), "--json", "analyze", "--hr-min", "100", "--hr-max", "145")
+    assert result["activities"] == 15
+    assert len(result["ewma"]["y"]) == 15
+    assert len(list(cache_dir.glob("trend_*.npz"))) == 1
+
+    db = DataBaseEditor(str(cache_dir / "trainings.db"))
+    db.add_activity_to_db(*make_activity(100, "2025-06-25T07:00:00Z", 140))
+    db.conn.close()
+    with patch("source.cli.TrendAnalyzer.update", autospec=True) as update:
+        run(capsys, "--cache-dir", str(cache_dir), "--json", "analyze", "--hr-min", "100", "--hr-max", "145")
+    assert len(update.call_args.args[1]) == 1
+
+    result = run(
+        capsys,
+        "--cache-dir",
+        str(cache_dir),
+        "--json",
+        "analyze",
+        "--hr-min",
+        "100",
+        "--hr-max",
+        "145",
+        "--from",
+        "2025-06-10",
+        "--to",
+        "2025-06-12",
+    )
+    assert result["activities"] == 3
+
+
+def test_export(capsys, cache_dir):
+    main(["--cache-dir", str(cache_dir), "export", "--from", "2025-06-01", "--to", "2025-06-05"])
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["activity_id"] for line in lines] == [1, 2, 3, 4, 5]
+
+    output = cache_dir / "export.jsonl"
+    main(["--cache-dir", str(cache_dir), "export", "--with-streams", "--output", str(output)])
+    activities = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(activities) == 20
+    assert activities[0]["json_data"]["velocity_smooth"]["data"]
+
+
+def test_sync_fetches_streams_and_invalidates_cache(capsys, cache_dir):
+    (cache_dir / "trend_old.npz").write_bytes(b"")
+    api = MagicMock()
+    api.get_activities.return_value = [
+        make_activity(20, "2025-06-20T07:00:00Z")[0],
+        make_activity(200, "2025-05-01T07:00:00Z")[0],
+        make_activity(201, "2025-05-02T07:00:00Z")[0],
+    ]
+    api.get_activity_streams.side_effect = lambda activity_id, profile: (
+        None if activity_id == 201 else make_activity(activity_id, "")[1]
+    )
+    api.is_profile_sufficient.return_value = True
+
+    with patch("source.cli._create_api", return_value=api):
+        result = run(capsys, "--cache-dir", str(cache_dir), "--json", "--workers", "2", "sync", "--profile", "trend")
+    assert result == {"from": "2025-06-20", "found": 3, "added": 1, "upgraded": 0, "failed": 1}
+    assert api.get_activities.call_args.args[0] == "2025-06-20"
+    assert not list(cache_dir.glob("trend_*.npz"))
+
+
+def test_backfill_upgrade_invalidates_cache_and_survives_network_errors(capsys, cache_dir):
+    (cache_dir / "trend_old.npz").write_bytes(b"")
+    api = MagicMock()
+    api.get_activities.return_value = [make_activity(day, f"2025-06-{day:02d}T07:00:00Z")[0] for day in (1, 2, 3)]
+
+    def get_activity_streams(activity_id, profile):
+        if activity_id == 2:
+            raise requests.ConnectionError("connection reset")
+        return make_activity(activity_id, "", speed=5.0)[1]
+
+    api.get_activity_streams.side_effect = get_activity_streams
+    api.is_profile_sufficient.return_value = False
+
+    with patch("source.cli._create_api", return_value=api):
+        result = run(capsys, "--cache-dir", str(cache_dir), "--json", "backfill", "--from", "2025-06-01")
+    assert result == {"from": "2025-06-01", "to": result["to"], "found": 3, "added": 0, "upgraded": 2, "failed": 1}
+    assert not list(cache_dir.glob("trend_*.npz"))
+
+
+def test_webhook_invalidates_cache_for_backdated_activity(cache_dir):
+    (cache_dir / "trend_old.npz").write_bytes(b"")
+    api = MagicMock()
+    api.get_activity.return_value = make_activity(300, "2025-06-05T05:00:00Z")[0]
+    api.get_activity_streams.return_value = make_activity(300, "")[1]
+    queue = IngestQueue()
+    queue.put(300, "create")
+
+    with (
+        patch("source.cli._create_api", return_value=api),
+        patch("source.webhook.IngestQueue", return_value=queue),
+        patch.object(queue, "wait", side_effect=[True, KeyboardInterrupt]),
+    ):
+        main(["--cache-dir", str(cache_dir), "webhook", "--verify-token", "secret", "--port", "0"])
+    assert not list(cache_dir.glob("trend_*.npz"))
+
+
+def test_bench(capsys, cache_dir):
+    result = run(
+        capsys,
+        "--cache-dir",
+        str(cache_dir),
+        "--json",
+        "bench",
+        "--activities",
+        "100",
+        "--samples",
+        "1000",
+        "--repeat",
+        "1",
+    )
+    assert set(result["results"]) >= {"trend_update", "decimate_lttb", "clean_streams", "db_read"}
+
+
+def test_efforts(capsys, cache_dir):
+    result = run(capsys, "--cache-dir", str(cache_dir), "--json", "efforts", "--distances", "1000")
+    assert result["best_efforts"] == {"1000": []}
+    assert result["splits_in_hr_range"] == 0
@@ -1,3 +1,4 @@
+import sqlite3
 from contextlib import contextmanager
 
 import pytest
@@ -102,7 +103,10 @@ def test_read_data_in_time_range_negative(test_db, activity, data):
 def test_read_data_in_hr_range_positive(test_db, activity, data):
     with mute_logger():
         test_db.add_activity_to_db(activity, data)
-    assert test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 10, 180)
+    data = test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 10, 180)
+    assert data
+    assert data.activity_id.tolist() == [activity["id"]]
+    assert data.pace[0] == pytest.approx(1000 / (activity["average_speed"] * 60))
 
 
 @pytest.mark.parametrize("activity, data", activities_data)
@@ -111,3 +115,220 @@ def test_read_data_in_hr_range_negative(test_db, activity, data):
         test_db.add_activity_to_db(activity, data)
     assert not test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 10, 130)
     assert not test_db.read_data_in_hr_range("31 May 2025", "2025-06-03", 10, 180)
+
+
+def test_stream_profile_stored_and_upgraded(test_db):
+    activity, data = activities_data[0]
+    with mute_logger():
+        assert test_db.add_activity_to_db(activity, data, "trend")
+    assert test_db.get_stream_profile(activity["id"]) == "trend"
+
+    assert test_db.update_activity_streams(activity["id"], {"time": {"data": [0, 1]}}, "detail")
+    assert test_db.get_stream_profile(activity["id"]) == "detail"
+    assert not test_db.update_activity_streams(999, {}, "detail")
+    assert test_db.get_stream_profile(999) is None
+
+
+def test_missing_columns_added_to_old_database(tmp_path):
+    db_file = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE trainings (id INTEGER PRIMARY KEY AUTOINCREMENT, activity_id INTEGER, start_date TEXT, "
+        "sport_type TEXT, average_heartrate REAL, average_speed REAL, json_data TEXT)"
+    )
+    conn.execute("INSERT INTO trainings (activity_id, start_date) VALUES (1, '2025-06-01T05:00:00Z')")
+    conn.execute("ALTER TABLE trainings ADD COLUMN clean_data TEXT")
+    conn.execute(
+        "INSERT INTO trainings (activity_id, start_date, clean_data) VALUES "
+        """(2, '2025-06-02T05:00:00Z', '{"quality": {"moving_average_speed": 3.5}}')"""
+    )
+    conn.commit()
+    conn.close()
+
+    db = DataBaseEditor(path=db_file)
+    db.cursor.execute("PRAGMA table_info(trainings)")
+    assert "stream_profile" in {row[1] for row in db.cursor.fetchall()}
+    db.cursor.execute("SELECT start_epoch, moving_average_speed FROM trainings ORDER BY activity_id")
+    assert db.cursor.fetchall() == [(1748754000, None), (1748840400, 3.5)]
+    db.conn.close()
+
+
+def test_streams_cleaned_at_ingest(test_db):
+    activity, _ = activities_data[0]
+    data = {"velocity_smooth": {"data": [3.0] * 20}, "heartrate": {"data": [150] * 20}}
+    with mute_logger():
+        assert test_db.add_activity_to_db(activity, data)
+        assert test_db.add_activity_to_db(activities_data[1][0], activities_data[1][1])
+    assert not test_db.read_clean_streams(activity["id"])["quality"]["low_quality"]
+    assert test_db.read_clean_streams(activities_data[1][0]["id"])["quality"]["low_quality"]
+    assert len(test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 10, 180)) == 2
+    assert len(test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 10, 180, skip_low_quality=True)) == 1
+
+
+def test_range_reads_use_moving_averages(test_db):
+    activity, _ = activities_data[0]
+    # Half of the run is a stop at a traffic light with lower heart rate.
+    data = {
+        "velocity_smooth": {"data": [4.0] * 10 + [0.0] * 10},
+        "heartrate": {"data": [160] * 10 + [120] * 10},
+        "moving": {"data": [True] * 10 + [False] * 10},
+    }
+    with mute_logger():
+        assert test_db.add_activity_to_db({**activity, "average_speed": 2.0, "average_heartrate": 140.0}, data)
+    records = test_db.read_data_in_time_range("2025-05-31", "2025-06-03")
+    assert records.average_speed.tolist() == [4.0]
+    assert records.average_heartrate.tolist() == [160.0]
+    assert len(test_db.read_data_in_hr_range("2025-05-31", "2025-06-03", 150, 170)) == 1
+
+
+def test_clean_missing_activities(test_db):
+    activity, data = activities_data[0]
+    with mute_logger():
+        test_db.add_activity_to_db(activity, data)
+    test_db.cursor.execute("UPDATE trainings SET clean_data = NULL")
+    assert test_db.read_clean_streams(activity["id"]) is None
+    assert test_db.clean_missing_activities() == 1
+    assert test_db.read_clean_streams(activity["id"]) is not None
+    assert test_db.clean_missing_activities() == 0
+
+
+def test_compute_missing_efforts(test_db):
+    activity, _ = activities_data[0]
+    time = list(range(0, 1201))
+    data = {
+        "time": {"data": time},
+        "distance": {"data": [t * 4.0 for t in time]},
+        "heartrate": {"data": [150] * len(time)},
+        "velocity_smooth": {"data": [4.0] * len(time)},
+    }
+    with mute_logger():
+        test_db.add_activity_to_db(activity, data)
+        test_db.add_activity_to_db(*activities_data[1])
+    assert test_db.compute_missing_efforts((1000, 5000)) == 2
+    assert test_db.compute_missing_efforts((1000, 5000)) == 0
+
+    best = test_db.read_best_efforts(1000)
+    assert len(best) == 1 and best[0][0] == activity["id"] and best[0][2] == 250
+    assert not test_db.read_best_efforts(5000)
+    assert len(test_db.read_splits_in_hr_range("2025-05-31", "2025-06-03", 140, 160)) == 4
+    assert not test_db.read_splits_in_hr_range("2025-05-31", "2025-06-03", 100, 140)
+
+    test_db.update_activity_streams(activity["id"], data, "detail")
+    assert not test_db.read_best_efforts(1000)
+    assert test_db.compute_missing_efforts((1000, 5000)) == 1
+    assert test_db.read_best_efforts(1000)
+
+
+def test_compute_efforts_for_new_distance(test_db):
+    activity, _ = activities_data[0]
+    time = list(range(0, 1201))
+    data = {
+        "time": {"data": time},
+        "distance": {"data": [t * 4.0 for t in time]},
+        "heartrate": {"data": [150] * len(time)},
+        "velocity_smooth": {"data": [4.0] * len(time)},
+    }
+    with mute_logger():
+        test_db.add_activity_to_db(activity, data)
+    assert test_db.compute_missing_efforts((1000,)) == 1
+    assert not test_db.read_best_efforts(2000)
+
+    assert test_db.compute_missing_efforts((1000, 2000)) == 1
+    assert test_db.read_best_efforts(2000)[0][2] == 500
+    # The 1 km effort is kept, splits are not duplicated.
+    assert test_db.read_best_efforts(1000)[0][2] == 250
+    test_db.cursor.execute("SELECT COUNT(*) FROM splits")
+    assert test_db.cursor.fetchone()[0] == 4
+    assert test_db.compute_missing_efforts((1000, 2000)) == 0
+    # Distances longer than the activity are remembered as computed too.
+    assert test_db.compute_missing_efforts((10000,)) == 1
+    assert test_db.compute_missing_efforts((10000,)) == 0
+
+
+def _run(activity_id, start_date, samples, elapsed_time=None):
+    activity = {
+        "id": activity_id,
+        "start_date": start_date,
+        "sport_type": "Run",
+        "average_heartrate": 150.0,
+        "average_speed": 3.0,
+        "elapsed_time": elapsed_time,
+    }
+    return activity, {"heartrate": {"data": [150] * samples}, "velocity_smooth": {"data": [3.0] * samples}}
+
+
+def test_duplicate_with_lower_resolution_is_aliased(test_db):
+    fit_id = -1748754003
+    with mute_logger():
+        assert test_db.add_activity_to_db(*_run(fit_id, "2025-06-01T05:00:03Z", 3600, 3600), "fit")
+        assert not test_db.add_activity_to_db(*_run(500, "2025-06-01 05:00:00", 720, 3590), "detail")
+    assert len(test_db.read_data_in_time_range("2025-05-31", "2025-06-02")) == 1
+    # Strava id is known, so sync does not fetch it again.
+    assert test_db.check_if_data_exist(500)
+    assert test_db.get_stream_profile(500) == "fit"
+
+
+def test_duplicate_with_higher_resolution_replaces_stored(test_db):
+    fit_id = -1748754003
+    with mute_logger():
+        assert test_db.add_activity_to_db(*_run(500, "2025-06-01 05:00:00", 720, 3590), "detail")
+        assert test_db.add_activity_to_db(*_run(fit_id, "2025-06-01T05:00:03Z", 3600, 3600), "fit")
+    records = test_db.read_data_in_time_range("2025-05-31", "2025-06-02")
+    assert records.activity_id.tolist() == [fit_id]
+    assert test_db.check_if_data_exist(500)
+    assert test_db.get_stream_profile(500) == "fit"
+
+    assert test_db.delete_activity(fit_id)
+    assert not test_db.check_if_data_exist(500)
+
+
+def test_different_activities_are_not_merged(test_db):
+    with mute_logger():
+        assert test_db.add_activity_to_db(*_run(1, "2025-06-01T05:00:00Z", 100, 1800))
+        # Same start, clearly different duration.
+        assert test_db.add_activity_to_db(*_run(2, "2025-06-01T05:00:30Z", 100, 3600))
+        # Matching duration, an hour later.
+        assert test_db.add_activity_to_db(*_run(3, "2025-06-01T06:00:00Z", 100, 1800))
+    assert len(test_db.read_data_in_time_range("2025-05-31", "2025-06-02")) == 3
+
+
+def test_efforts_use_cleaned_streams_and_skip_low_quality(test_db):
+    time = list(range(0, 1201))
+    # Heart rate dropout is filled at ingest, the first minute is a stop with low heart rate.
+    heartrate = [100] * 60 + [150] * (len(time) - 60)
+    heartrate[300:305] = [0] * 5
+    data = {
+        "time": {"data": time},
+        "distance": {"data": [max(t - 60, 0) * 5.0 for t in time]},
+        "heartrate": {"data": heartrate},
+        "velocity_smooth": {"data": [0.0] * 60 + [5.0] * (len(time) - 60)},
+    }
+    # GPS jumps: distance grows 100 m per second, velocity stream is full of spikes.
+    spiky = {
+        "time": {"data": time},
+        "distance": {"data": [t * 100.0 for t in time]},
+        "heartrate": {"data": [150] * len(time)},
+        "velocity_smooth": {"data": [100.0] * len(time)},
+    }
+    with mute_logger():
+        test_db.add_activity_to_db(activities_data[0][0], data)
+        test_db.add_activity_to_db(activities_data[1][0], spiky)
+    test_db.compute_missing_efforts((1000,))
+
+    best = test_db.read_best_efforts(1000)
+    assert [row[0] for row in best] == [activities_data[0][0]["id"]]
+    assert len(test_db.read_best_efforts(1000, skip_low_quality=False)) == 2
+    split_rows = test_db.read_splits_in_hr_range("2025-05-31", "2025-06-03", 149, 151)
+    assert {row[0] for row in split_rows} == {activities_data[0][0]["id"]}
+    assert len(split_rows) == 5
+
+
+def test_upgraded_streams_update_resolution(test_db):
+    fit_id = -1748754003
+    with mute_logger():
+        assert test_db.add_activity_to_db(*_run(500, "2025-06-01 05:00:00", 360, 3590), "trend")
+        assert test_db.update_activity_streams(500, _run(500, "", 3590)[1], "detail")
+        # Sparse smart recording of the same run does not replace the detailed Strava copy.
+        assert not test_db.add_activity_to_db(*_run(fit_id, "2025-06-01T05:00:03Z", 1200, 3600), "fit")
+    assert test_db.read_data_in_time_range("2025-05-31", "2025-06-02").activity_id.tolist() == [500]
+    assert test_db.check_if_data_exist(fit_id)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from source.decimation import decimate, lttb, min_max, to_chart_payload
+
+
+@pytest.fixture
+def series():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500) + np.random.default_rng(0).normal(0, 0.01, len(x))
+    y[4321] = 10
+    return x, y
+
+
+def test_lttb_caps_points_and_keeps_edges(series):
+    x, y = series
+    indices = lttb(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_lttb_short_series_untouched():
+    assert np.array_equal(lttb([1, 2, 3], [1, 2, 3], 10), [0, 1, 2])
+    assert np.array_equal(lttb([1, 2, 3, 4], [1, 2, 3, 4], 3), [0, 1, 3])
+
+
+def test_max_points_below_method_minimum(series):
+    x, y = series
+    assert len(lttb(x, y, 3)) == 3
+    assert len(min_max(y, 2)) <= 2
+    with pytest.raises(ValueError):
+        lttb(x, y, 2)
+    with pytest.raises(ValueError):
+        min_max(y, 1)
+    with pytest.raises(ValueError):
+        decimate(x[:10], y[:10], 2)
+
+
+def test_min_max_keeps_extremes(series):
+    _, y = series
+    indices = min_max(y, 200)
+    assert len(indices) <= 200
+    assert np.argmax(y) in indices and np.argmin(y) in indices
+    assert np.array_equal(min_max(y[:10], 20), np.arange(10))
+
+
+def test_decimate_drops_non_finite_values():
+    x = np.arange(5)
+    y = np.array([1.0, np.nan, 3, np.inf, 5])
+    decimated_x, decimated_y = decimate(x, y, 10)
+    assert decimated_x.tolist() == [0, 2, 4]
+    assert decimated_y.tolist() == [1, 3, 5]
+
+
+def test_decimate_invalid_input():
+    with pytest.raises(ValueError):
+        decimate([1, 2], [1, 2], 10, "random")
+    with pytest.raises(ValueError):
+        decimate([1, 2], [1], 10)
+
+
+def test_to_chart_payload_with_dates():
+    dates = [datetime(2025, 1, 1) + timedelta(hours=i) for i in range(1000)]
+    payload = to_chart_payload(dates, np.linspace(4, 6, 1000), 100, "minmax")
+    assert len(payload["x"]) == len(payload["y"]) <= 100
+    assert payload["total_points"] == 1000
+    assert payload["x"][0] == "2025-01-01T00:00:00"
@@ -0,0 +1,28 @@
+from source.dedup import Fingerprint
+
+
+def test_fingerprint_from_activity():
+    activity = {"start_date": "2025-06-01T05:00:00Z"}
+    data = {"time": {"data": [0, 1, 2, 3599]}, "heartrate": {"data": [150, 151, 152, 153]}}
+    fingerprint = Fingerprint.from_activity(activity, data)
+    assert fingerprint.start_epoch == 1748754000
+    assert fingerprint.elapsed_time == 3599
+    assert fingerprint.sample_count == 4
+
+    naive = Fingerprint.from_activity({"start_date": "2025-06-01 05:00:00", "elapsed_time": 60}, {})
+    assert naive.start_epoch == 1748754000
+    assert naive.elapsed_time == 60
+    assert naive.sample_count == 0
+
+
+def test_fingerprint_matches_within_tolerance():
+    strava = Fingerprint(1748754000, 3590, 720)
+    assert strava.matches(Fingerprint(1748754003, 3600, 3600))
+    assert strava.matches(Fingerprint(1748754030, None, 3600))
+    assert not strava.matches(Fingerprint(1748754000 + 3600, 3590, 720))
+    assert not strava.matches(Fingerprint(1748754000, 1800, 720))
+
+
+def test_fingerprint_resolution():
+    assert Fingerprint(0, 3600, 3600).resolution > Fingerprint(0, 3590, 720).resolution
+    assert Fingerprint(0, None, 10).resolution == 10
@@ -0,0 +1,55 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from source.common import DataAnalyzer
+from source.records import RECORD_COLUMNS, ActivityRecords, speed_to_pace
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE trainings ({', '.join(RECORD_COLUMNS)})")
+    conn.executemany(
+        "INSERT INTO trainings VALUES (?, ?, ?, ?, ?)",
+        [(i, f"2025-06-{i % 28 + 1:02d} 07:00:00", 140 + i % 10, 3.0, i % 2) for i in range(25)]
+        + [(100, "2025-07-01 07:00:00", None, 0.0, None)],
+    )
+    yield conn.execute(f"SELECT {', '.join(RECORD_COLUMNS)} FROM trainings")
+    conn.close()
+
+
+def test_speed_to_pace():
+    assert speed_to_pace([1000 / 300, 0, np.nan])[0] == pytest.approx(5.0)
+    assert np.isnan(speed_to_pace([0, np.nan])).all()
+
+
+def test_from_cursor_in_batches(cursor):
+    records = ActivityRecords.from_cursor(cursor, batch_size=4)
+    assert len(records) == 26
+    assert records.activity_id.dtype == np.int64
+    assert records.start_date.dtype == np.dtype("datetime64[s]")
+    assert records.start_date[0] == np.datetime64("2025-06-01T07:00:00")
+    assert records.pace[0] == pytest.approx(1000 / 180)
+    assert np.isnan(records.average_heartrate[-1]) and np.isnan(records.pace[-1])
+    assert records.low_quality.sum() == 12
+
+
+def test_empty_and_subset(cursor):
+    assert not ActivityRecords.empty()
+    assert not ActivityRecords.from_cursor(cursor.connection.execute("SELECT * FROM trainings WHERE 0"))
+
+    records = ActivityRecords.from_cursor(cursor)
+    subset = records[~records.low_quality]
+    assert len(subset) == 14
+    assert not hasattr(subset, "__dict__")
+
+
+def test_data_analyzer_consumes_records(cursor):
+    records = ActivityRecords.from_cursor(cursor)
+    dates, paces = DataAnalyzer(records).extract_date_and_pace()
+    assert dates is records.start_date and paces is records.pace
+    assert DataAnalyzer(records).extract_date_pace_and_hr()[2] is records.average_heartrate
+    with pytest.raises(ValueError):
+        DataAnalyzer(ActivityRecords.empty())
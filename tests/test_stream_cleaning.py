@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+
+from source.stream_cleaning import clean_streams, clip_velocity, detect_moving, fill_hr_gaps, stream_arrays
+
+
+@pytest.fixture
+def streams():
+    velocity = [3.0] * 100
+    velocity[10] = 45.0
+    velocity[50:60] = [0.0] * 10
+    heartrate = [150] * 100
+    heartrate[20:25] = [0] * 5
+    return {
+        "velocity_smooth": {"data": velocity},
+        "heartrate": {"data": heartrate},
+        "time": {"data": list(range(100))},
+    }
+
+
+def test_stream_arrays_accepts_list_and_dict():
+    as_list = [{"type": "heartrate", "data": [1, 2]}, {"type": "time", "data": [0, 1]}]
+    assert set(stream_arrays(as_list)) == {"heartrate", "time"}
+    assert stream_arrays({"heartrate": {"data": [1, 2]}})["heartrate"].tolist() == [1, 2]
+    assert stream_arrays(None) == {}
+
+
+def test_clip_velocity():
+    cleaned, spikes = clip_velocity(np.array([3.0, 50.0, 4.0, -1.0]))
+    assert cleaned.tolist() == [3.0, 3.5, 4.0, 4.0]
+    assert spikes.tolist() == [False, True, False, True]
+
+
+def test_fill_hr_gaps_only_short_inner_gaps():
+    heartrate = np.array([0, 140, 0, 0, 146, 0, 0, 0, 150, 0], dtype=float)
+    cleaned = fill_hr_gaps(heartrate, max_gap=2)
+    assert np.isnan(cleaned[0]) and np.isnan(cleaned[-1])
+    assert cleaned[1:5].tolist() == [140, 142, 144, 146]
+    assert np.isnan(cleaned[5:8]).all()
+
+
+def test_detect_moving():
+    velocity = np.array([0.0, 0.5, 2.0])
+    assert detect_moving(velocity).tolist() == [False, False, True]
+    assert detect_moving(velocity, np.array([1.0, 1.0, 0.0])).tolist() == [True, True, False]
+
+
+def test_clean_streams(streams):
+    cleaned = clean_streams(streams)
+    quality = cleaned["quality"]
+    assert json.loads(json.dumps(cleaned)) == cleaned
+    assert cleaned["velocity"][10] == 3.0
+    assert cleaned["heartrate"][20:25] == [150.0] * 5
+    assert sum(cleaned["moving"]) == 90
+    assert quality["spike_count"] == 1
+    assert quality["moving_average_speed"] == pytest.approx(3.0)
+    assert not quality["low_quality"]
+
+
+def test_clean_streams_low_quality(streams):
+    streams["heartrate"]["data"] = [0] * 100
+    quality = clean_streams(streams)["quality"]
+    assert quality["low_quality"]
+    assert quality["reasons"] == ["heart rate coverage too low"]
+    assert clean_streams({"heartrate": {"data": [150]}})["quality"]["low_quality"]
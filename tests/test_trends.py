@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from source.trends import TrendAnalyzer, ewma, period_codes, period_start, rolling_mean
+
+
+def naive_ewma(values, span):
+    alpha = 2 / (span + 1)
+    result = [values[0]]
+    for value in values[1:]:
+        result.append((1 - alpha) * result[-1] + alpha * value)
+    return np.array(result)
+
+
+@pytest.fixture
+def activities():
+    rng = np.random.default_rng(0)
+    dates = [datetime(2025, 1, 1) + timedelta(days=i) for i in range(400)]
+    heart_rates = rng.uniform(120, 170, len(dates))
+    paces = 9 - heart_rates / 40 + rng.normal(0, 0.05, len(dates))
+    return dates, paces, heart_rates
+
+
+def test_rolling_mean():
+    values = np.array([1.0, 2, 3, 4, 5])
+    assert np.allclose(rolling_mean(values, 2), [1, 1.5, 2.5, 3.5, 4.5])
+    with pytest.raises(ValueError):
+        rolling_mean(values, 0)
+
+
+@pytest.mark.parametrize("span", [1, 3, 30])
+def test_ewma_matches_recursive_definition(span):
+    values = np.random.default_rng(1).uniform(4, 7, 1000)
+    assert np.allclose(ewma(values, span), naive_ewma(values, span))
+
+
+def test_period_codes_weeks_start_on_monday():
+    dates = np.array(["2025-06-01", "2025-06-02", "2025-06-08", "2025-06-09"], dtype="datetime64[s]")
+    codes = period_codes(dates, "week")
+    assert codes[0] != codes[1] and codes[1] == codes[2] != codes[3]
+    assert period_start(codes[1:2], "week")[0] == np.datetime64("2025-06-02")
+    assert period_start(period_codes(dates[:1], "month"), "month")[0] == np.datetime64("2025-06-01")
+
+
+def test_incremental_update_equals_full_computation(activities):
+    dates, paces, heart_rates = activities
+    full = TrendAnalyzer()
+    full.update(dates, paces, heart_rates)
+
+    incremental = TrendAnalyzer()
+    for start in range(0, len(dates), 37):
+        incremental.update(dates[start : start + 37], paces[start : start + 37], heart_rates[start : start + 37])
+
+    assert np.allclose(incremental.rolling, full.rolling)
+    assert np.allclose(incremental.ewma, full.ewma)
+    assert np.allclose(full.rolling, rolling_mean(paces, full.window))
+    assert np.allclose(full.ewma, naive_ewma(paces, full.span))
+    assert np.allclose(incremental.pace_at_reference_hr()[1], full.pace_at_reference_hr()[1], equal_nan=True)
+
+
+def test_out_of_order_update_recomputes(activities):
+    dates, paces, heart_rates = activities
+    analyzer = TrendAnalyzer()
+    analyzer.update(dates[200:], paces[200:], heart_rates[200:])
+    analyzer.update(dates[:200], paces[:200], heart_rates[:200])
+    assert np.all(np.diff(analyzer.dates.astype(np.int64)) > 0)
+    assert np.allclose(analyzer.ewma, naive_ewma(paces, analyzer.span))
+
+
+def test_pace_at_reference_hr(activities):
+    dates, paces, heart_rates = activities
+    analyzer = TrendAnalyzer(period="month", reference_hr=140)
+    analyzer.update(dates, paces, heart_rates)
+    periods, estimates = analyzer.pace_at_reference_hr()
+    assert len(periods) == 14
+    assert np.allclose(estimates, 9 - 140 / 40, atol=0.1)
+
+
+def test_pace_at_reference_hr_not_enough_samples():
+    analyzer = TrendAnalyzer(min_samples=3)
+    analyzer.update([datetime(2025, 6, 2), datetime(2025, 6, 3)], [5.0, 5.5], [140, 150])
+    assert np.isnan(analyzer.pace_at_reference_hr()[1]).all()
+
+
+def test_invalid_samples_are_skipped():
+    analyzer = TrendAnalyzer()
+    analyzer.update([datetime(2025, 6, 2), datetime(2025, 6, 3)], [float("nan"), 5.5], [None, 150])
+    assert len(analyzer) == 1
+    with pytest.raises(ValueError):
+        analyzer.update([datetime(2025, 6, 4)], [5.0, 5.5], [140])
+
+
+def test_save_and_load(tmp_path, activities):
+    dates, paces, heart_rates = activities
+    analyzer = TrendAnalyzer(period="month")
+    analyzer.update(dates[:300], paces[:300], heart_rates[:300])
+    path = str(tmp_path / "trend.npz")
+    analyzer.save(path)
+
+    restored = TrendAnalyzer.load(path)
+    restored.update(dates[300:], paces[300:], heart_rates[300:])
+    analyzer.update(dates[300:], paces[300:], heart_rates[300:])
+    assert restored.period == "month"
+    assert np.allclose(restored.ewma, analyzer.ewma)
+    assert np.allclose(restored.pace_at_reference_hr()[1], analyzer.pace_at_reference_hr()[1], equal_nan=True)
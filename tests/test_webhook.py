@@ -0,0 +1,151 @@
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from extra_tools.webhook_simulator import make_event, make_validation_params
+from source.api import StravaAPI
+from source.database import DataBaseEditor
+from source.webhook import MAX_ATTEMPTS, WEBHOOK_PATH, IngestQueue, WebhookIngestor, create_app
+
+
+def summary(activity_id, sport_type="Run"):
+    return {
+        "id": activity_id,
+        "start_date": f"2025-06-01T{activity_id:02d}:00:00Z",
+        "sport_type": sport_type,
+        "average_heartrate": 140.0,
+        "average_speed": 3.0,
+    }
+
+
+@pytest.fixture
+def queue():
+    return IngestQueue()
+
+
+@pytest.fixture
+def client(queue):
+    return create_app(queue, "secret").test_client()
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    db = DataBaseEditor(path=str(tmp_path / "test.db"))
+    yield db
+    db.conn.close()
+
+
+@pytest.fixture
+def api_mock():
+    api = MagicMock()
+    api.sport_types = {3: "Ride"}
+    api.get_activity.side_effect = lambda activity_id: summary(activity_id, api.sport_types.get(activity_id, "Run"))
+    api.get_activity_streams.return_value = {"velocity_smooth": {"data": [3.0] * 10}}
+    api.is_retryable_status = StravaAPI.is_retryable_status
+    api.last_status_code = HTTPStatus.OK
+    return api
+
+
+def test_subscription_validation(client):
+    response = client.get(WEBHOOK_PATH, query_string=make_validation_params("secret", "abc"))
+    assert response.status_code == 200
+    assert response.get_json() == {"hub.challenge": "abc"}
+
+    response = client.get(WEBHOOK_PATH, query_string=make_validation_params("wrong"))
+    assert response.status_code == 403
+
+
+def test_events_are_enqueued(client, queue):
+    assert client.post(WEBHOOK_PATH, json=make_event(1, "create")).status_code == 200
+    assert client.post(WEBHOOK_PATH, json=make_event(1, "update", {"title": "Morning Run"})).status_code == 200
+    assert client.post(WEBHOOK_PATH, json=make_event(2, "update", {"type": "Ride"})).status_code == 200
+    assert client.post(WEBHOOK_PATH, json=make_event(7, "create", object_type="athlete")).status_code == 200
+    assert client.post(WEBHOOK_PATH, json={"object_type": "activity", "aspect_type": "create"}).status_code == 400
+    assert queue.drain() == [(1, "create", {"title": "Morning Run"}), (2, "update", {"type": "Ride"})]
+    assert not len(queue)
+
+
+def test_queue_keeps_latest_event(queue):
+    queue.put(1, "create")
+    queue.put(1, "delete")
+    queue.put(2, "update", {"type": "Ride"})
+    queue.put(2, "update", {"title": "Evening"})
+    queue.put(3, "delete")
+    queue.put(3, "update", {"title": "x"})
+    assert queue.wait(timeout=0)
+    assert queue.drain() == [
+        (1, "delete", {}),
+        (2, "update", {"type": "Ride", "title": "Evening"}),
+        (3, "delete", {}),
+    ]
+    assert not queue.wait(timeout=0)
+
+
+def test_ingestor_applies_events(queue, test_db, api_mock):
+    ingestor = WebhookIngestor(api_mock, test_db, queue, ["Run", "TrailRun"], "trend")
+    for activity_id in (1, 2, 3, 4):
+        queue.put(activity_id, "create")
+    assert ingestor.process_pending() == {"added": 3, "updated": 0, "deleted": 0, "skipped": 1, "failed": 0}
+    assert api_mock.get_activity_streams.call_count == 3
+    assert test_db.get_stream_profile(1) == "trend"
+    assert ingestor.oldest_added == "2025-06-01 01:00:00"
+
+    queue.put(1, "update", {"type": "TrailRun"})
+    queue.put(2, "delete")
+    queue.put(1000, "delete")
+    assert ingestor.process_pending() == {"added": 0, "updated": 1, "deleted": 1, "skipped": 1, "failed": 0}
+    assert not test_db.check_if_data_exist(2)
+    assert ingestor.oldest_added is None
+    assert test_db.iter_activities("2025-06-01", "2025-06-01").__next__()["sport_type"] == "TrailRun"
+
+
+def test_ingestor_follows_sport_type_changes(queue, test_db, api_mock):
+    ingestor = WebhookIngestor(api_mock, test_db, queue, ["Run"])
+    queue.put(1, "create")
+    queue.put(3, "create")
+    assert ingestor.process_pending()["added"] == 1
+
+    # Run changed to Walk leaves the database, Ride changed to Run is fetched.
+    api_mock.sport_types[3] = "Run"
+    queue.put(1, "update", {"type": "Walk"})
+    queue.put(3, "update", {"type": "Run"})
+    assert ingestor.process_pending() == {"added": 1, "updated": 0, "deleted": 1, "skipped": 0, "failed": 0}
+    assert not test_db.check_if_data_exist(1)
+    assert test_db.check_if_data_exist(3)
+
+
+def test_ingestor_retries_failed_fetches(queue, test_db, api_mock):
+    api_mock.get_activity_streams.return_value = None
+    api_mock.last_status_code = HTTPStatus.TOO_MANY_REQUESTS
+    ingestor = WebhookIngestor(api_mock, test_db, queue)
+    queue.put(5, "create")
+    assert ingestor.process_pending()["failed"] == 1
+    assert len(queue) == 1
+
+    queue.retry(5, "create")
+    queue.put(5, "delete")
+    queue.retry(5, "create")
+    assert queue.drain() == [(5, "delete", {})]
+
+
+def test_ingestor_limits_retries(queue, test_db, api_mock):
+    api_mock.get_activity.side_effect = requests.ConnectionError("offline")
+    ingestor = WebhookIngestor(api_mock, test_db, queue)
+    queue.put(5, "create")
+    for _ in range(MAX_ATTEMPTS):
+        assert ingestor.process_pending()["failed"] == 1
+    assert not len(queue)
+    assert api_mock.get_activity.call_count == MAX_ATTEMPTS
+
+
+def test_ingestor_drops_client_errors(queue, test_db, api_mock):
+    api_mock.get_activity.side_effect = None
+    api_mock.get_activity.return_value = None
+    api_mock.last_status_code = HTTPStatus.NOT_FOUND
+    ingestor = WebhookIngestor(api_mock, test_db, queue)
+    queue.put(5, "create")
+    assert ingestor.process_pending()["skipped"] == 1
+    assert not len(queue)
+    assert api_mock.get_activity.call_count == 1